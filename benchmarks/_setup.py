@@ -0,0 +1,16 @@
+""" Minimal Django setup for benchmarks: model metadata only, no database or .env needed. """
+import os
+import sys
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not settings.configured:
+    settings.configure(
+        INSTALLED_APPS=['django.contrib.contenttypes', 'paypal.domain'],
+        DATABASES={},
+        USE_TZ=False,
+    )
+    django.setup()
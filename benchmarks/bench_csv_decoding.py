@@ -0,0 +1,68 @@
+"""
+Compare per-cell UUID sniffing (the old CsvReader.parse path) with the schema-driven
+CsvRowDecoder on rows of a generated CSV.
+
+Usage: python benchmarks/bench_csv_decoding.py [rows_per_entity]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import _setup  # noqa: F401
+
+from paypal.domain.csv_logic import (
+    CsvGenerator,
+    CsvReader,
+)
+from paypal.domain.csv_logic.csv_reader import (
+    CsvConverterHandler,
+    CsvRowDecoder,
+)
+
+
+def read_sections(filename: str) -> list:
+    sections = []
+    with open(filename, newline='\n') as csvfile:
+        for row in csv.reader(csvfile, delimiter=';', quotechar='|'):
+            if CsvReader._is_row_a_header(row):
+                sections.append((row, []))
+            elif not CsvReader._is_row_blank(row):
+                sections[-1][1].append(row)
+    return sections
+
+
+def sniff_every_cell(header: list, rows: list) -> None:
+    for row in rows:
+        row = [CsvConverterHandler.convert_str_to_uuid(value) for value in row]
+        CsvConverterHandler.convert_row_to_dict(header, row)
+
+
+def decode_typed(header: list, rows: list) -> None:
+    decoder = CsvRowDecoder(CsvConverterHandler.map_header_to_model(header), header)
+    for row in rows:
+        decoder.decode(list(row))
+
+
+def main(rows_per_entity: int) -> None:
+    sample_rows = 1000
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'bench.csv')
+        CsvGenerator.generate_csv(filename, sample_rows)
+        sections = read_sections(filename)
+
+    repeat = max(1, rows_per_entity // (sample_rows // 5))
+    sections = [(header, rows * repeat) for header, rows in sections]
+    total_rows = sum(len(rows) for _, rows in sections)
+
+    for name, function in [('sniff every cell', sniff_every_cell), ('typed decoder', decode_typed)]:
+        started = time.perf_counter()
+        for header, rows in sections:
+            function(header, rows)
+        elapsed = time.perf_counter() - started
+        print(f'{name:>18}: {total_rows} rows in {elapsed:.2f}s ({total_rows / elapsed:,.0f} rows/s)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,89 @@
+"""
+Compare the memory and draw speed of the CsvGenerator id pools (IdPool, ids computed from
+their index) with the lists of uuid.UUID objects they replace.
+Memory per id should stay a small constant for IdPool as the row count grows; the lists
+are skipped above 10M rows, where they stop fitting in a few GB of RAM.
+
+Usage: python benchmarks/bench_id_pools.py [max_rows]
+"""
+import random
+import sys
+import time
+import uuid
+
+import _setup  # noqa: F401
+
+from paypal.domain.csv_logic import CsvGenerator
+from paypal.domain.csv_logic.id_pool import IdPool
+from paypal.domain.csv_logic.value_bank import FakerValueBank
+
+POOL_NAMES = ["account_ids", "billing_address_ids", "card_ids", "transaction_ids"]
+DRAWS = 1000000
+
+
+def uuid_lists(seed: int, rows_per_entity: int, coverage: float) -> dict:
+    pools = {}
+    for pool_name in POOL_NAMES:
+        rng = random.Random(f'{seed}-{pool_name}')
+        pools[pool_name] = [
+            uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(rows_per_entity)
+        ]
+    pools["personal_data_ids"] = random.Random(f'{seed}-personal_data').sample(
+        pools["account_ids"], round(rows_per_entity * coverage)
+    )
+    return pools
+
+
+def get_size(pools: dict) -> int:
+    """
+    Return the bytes held by the pools: containers, ids and their integers, each object
+    counted once (personal data shares the account ids).
+    """
+    seen = set()
+    size = 0
+    for value in [pools, *pools.values()]:
+        objects = [value, *vars(value).values()] if isinstance(value, IdPool) else [value]
+        if isinstance(value, list):
+            objects += value + [item.int for item in value]
+        for item in objects:
+            if id(item) not in seen:
+                seen.add(id(item))
+                size += sys.getsizeof(item)
+    return size
+
+
+def draw(pool, bank: FakerValueBank) -> list:
+    if isinstance(pool, IdPool):
+        return CsvGenerator._draw_ids(pool, DRAWS, bank)
+    return bank.choices(pool, DRAWS)
+
+
+def measure(name: str, build) -> str:
+    started = time.perf_counter()
+    pools = build()
+    build_seconds = time.perf_counter() - started
+    memory = get_size(pools)
+
+    bank = FakerValueBank(0)
+    started = time.perf_counter()
+    draw(pools["card_ids"], bank)
+    draw_seconds = time.perf_counter() - started
+    ids = sum(len(pool) for pool in pools.values())
+    return (
+        f'{name}: build {build_seconds:.2f}s, {memory / 2 ** 20:.1f} MiB '
+        f'({memory / ids:.2f} B/id), {draw_seconds / DRAWS * 1e9:.0f} ns/draw'
+    )
+
+
+def main(max_rows: int) -> None:
+    rows = 10000000
+    while rows <= max_rows:
+        timings = [measure('IdPool', lambda: CsvGenerator._generate_pools(0, rows // 5, 0.8))]
+        if rows <= 10000000:
+            timings.append(measure('UUID lists', lambda: uuid_lists(0, rows // 5, 0.8)))
+        print(f'{rows:>11} rows | ' + ' | '.join(timings))
+        rows *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000000)
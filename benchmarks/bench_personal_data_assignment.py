@@ -0,0 +1,58 @@
+"""
+Compare rejection sampling of free accounts (the old CsvGenerator._get_unique_account_id
+loop) with the permutation-based CsvGenerator._assign_personal_data_accounts, including
+turning the picked accounts into ids.
+Time per account should stay flat for the permutation as the pool grows.
+
+Usage: python benchmarks/bench_personal_data_assignment.py [max_accounts]
+"""
+import random
+import sys
+import time
+import uuid
+
+import _setup  # noqa: F401
+
+from paypal.domain.csv_logic import CsvGenerator
+from paypal.domain.csv_logic.id_pool import IdPool
+
+
+def rejection_sampling(account_ids: list, rng: random.Random) -> list:
+    used_account_ids = set()
+    assigned = []
+    for _ in range(len(account_ids)):
+        new_id = rng.choice(account_ids)
+        while new_id in used_account_ids:
+            new_id = rng.choice(account_ids)
+        used_account_ids.add(new_id)
+        assigned.append(new_id)
+    return assigned
+
+
+def main(max_accounts: int) -> None:
+    accounts = 10000
+    while accounts <= max_accounts:
+        account_ids = [uuid.UUID(int=i) for i in range(accounts)]
+        account_pool = IdPool('accounts', accounts)
+        timings = []
+        for name, function in [
+            ('rejection', lambda: rejection_sampling(account_ids, random.Random(0))),
+            ('permutation', lambda: CsvGenerator._assign_personal_data_accounts(
+                account_pool, 1.0, random.Random(0)
+            )[:]),
+            ('permutation 80%', lambda: CsvGenerator._assign_personal_data_accounts(
+                account_pool, 0.8, random.Random(0)
+            )[:]),
+        ]:
+            if name == 'rejection' and accounts > 1000000:
+                continue
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+            timings.append(f'{name}: {elapsed:.3f}s ({elapsed / accounts * 1e9:.0f} ns/account)')
+        print(f'{accounts:>9} accounts | ' + ' | '.join(timings))
+        accounts *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,63 @@
+"""
+Compare reading the typed rows of a generated CSV with reading them from its snapshot
+(CsvSnapshot), and time the conversions both ways. Every step is timed REPEAT times and
+the best time is reported.
+
+Usage: python benchmarks/bench_snapshot_loading.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import _setup  # noqa: F401
+
+from paypal.domain.csv_logic import (
+    CsvGenerator,
+    CsvReader,
+    CsvSnapshot,
+)
+
+REPEAT = 3
+
+
+def read_rows(filename: str) -> int:
+    return sum(len(rows) for _, _, rows in CsvReader().iter_typed_batches(filename, 10000))
+
+
+def report(name: str, rows: int, elapsed: float) -> None:
+    print(f'{name:>18}: {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)')
+
+
+def main(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'bench.csv')
+        snapshot_filename = os.path.join(directory, 'bench.snap')
+        CsvGenerator.generate_csv(filename, rows)
+
+        timings = []
+        for name, function in [
+            ('CSV to snapshot', lambda: CsvReader().write_snapshot(filename, snapshot_filename)),
+            ('read CSV', lambda: read_rows(filename)),
+            ('read snapshot', lambda: read_rows(snapshot_filename)),
+            ('snapshot to CSV', lambda: CsvSnapshot.to_csv(
+                snapshot_filename, os.path.join(directory, 'converted.csv')
+            )),
+        ]:
+            elapsed = []
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                total_rows = function()
+                elapsed.append(time.perf_counter() - started)
+            timings.append((name, total_rows, min(elapsed)))
+        print(
+            f'CSV: {os.path.getsize(filename) / 2 ** 20:.1f} MiB, '
+            f'snapshot: {os.path.getsize(snapshot_filename) / 2 ** 20:.1f} MiB'
+        )
+
+    for name, total_rows, elapsed in timings:
+        report(name, total_rows, elapsed)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -5,12 +5,22 @@ from drf_spectacular.utils import (
     OpenApiResponse,
     OpenApiParameter,
 )
+from django.core.exceptions import ValidationError
 from injector import inject
 from rest_framework.response import Response
-from rest_framework.status import HTTP_200_OK
+from rest_framework.reverse import reverse
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_202_ACCEPTED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+)
 from rest_framework.views import APIView
 
-from paypal.app_services import CsvLoaderService
+from paypal.app_services import CsvLoaderJobService
+from paypal.domain.core.exceptions import ObjectDoesNotExistError
+from paypal.domain.csv_logic import BatchPipeline
+from paypal.domain.csv_logic.constants import CsvLoaderConstants
 
 
 class CsvLoaderAPIView(APIView):
@@ -19,23 +29,33 @@ class CsvLoaderAPIView(APIView):
     """
     GROUP_TAG = ["api-csv"]
 
-    def __init__(self, csv_loader_service: CsvLoaderService = CsvLoaderService(), *args, **kwargs):
+    def __init__(
+            self, csv_loader_job_service: CsvLoaderJobService = CsvLoaderJobService(),
+            *args, **kwargs
+    ):
         super(CsvLoaderAPIView, self).__init__(**kwargs)
-        self.csv_loader_service = csv_loader_service
+        self.csv_loader_job_service = csv_loader_job_service
 
     def dispatch(self, request, *args, **kwargs):
         return super(CsvLoaderAPIView, self).dispatch(request, *args, **kwargs)
 
     @inject
-    def setup(self, request, csv_loader_service: CsvLoaderService = CsvLoaderService(), *args, **kwargs):
-        super(CsvLoaderAPIView, self).setup(request, csv_loader_service, args, kwargs)
+    def setup(
+            self, request, csv_loader_job_service: CsvLoaderJobService = CsvLoaderJobService(),
+            *args, **kwargs
+    ):
+        super(CsvLoaderAPIView, self).setup(request, csv_loader_job_service, args, kwargs)
 
     @extend_schema(
         parameters=[
             OpenApiParameter(
                 "filename", OpenApiTypes.STR, OpenApiParameter.QUERY,
                 required=False, default='generated.csv',
-                description="Filename, should ALWAYS end with .csv"
+                description=(
+                    "Filename, should ALWAYS end with .csv, or .csv.gz for a file compressed "
+                    "in seekable blocks, or .snap for a binary snapshot (not with copy engine "
+                    "or checkpoints)"
+                )
             ),
             OpenApiParameter(
                 "rows_to_create", OpenApiTypes.INT, OpenApiParameter.QUERY,
@@ -48,25 +68,297 @@ class CsvLoaderAPIView(APIView):
                 required=False, default=False,
                 description="Should the database tables be truncated?"
             ),
+            OpenApiParameter(
+                "flush_engine",
+                OpenApiTypes.STR, OpenApiParameter.QUERY,
+                required=False, enum=CsvLoaderConstants.FlushEngines.values,
+                default=CsvLoaderConstants.FlushEngines.TRUNCATE,
+                description=(
+                    "How *flush_db* empties the tables: truncate (one TRUNCATE ... RESTART "
+                    "IDENTITY CASCADE, falls back to delete on databases other than "
+                    "PostgreSQL) or delete (QuerySet.delete() table by table)"
+                )
+            ),
             OpenApiParameter(
                 "regenerate_file_if_exists",
                 OpenApiTypes.BOOL, OpenApiParameter.QUERY,
                 required=False, default=False,
                 description="If file with *filename* exists, should it be cleared first?"
+            ),
+            OpenApiParameter(
+                "engine",
+                OpenApiTypes.STR, OpenApiParameter.QUERY,
+                required=False, enum=CsvLoaderConstants.Engines.values,
+                description=(
+                    "How rows are written: orm (one INSERT per row), bulk (batched multi-row "
+                    "INSERTs) or copy (PostgreSQL COPY straight from the file). "
+                    "Defaults to bulk if *batch_size* is set, otherwise to orm"
+                )
+            ),
+            OpenApiParameter(
+                "batch_size",
+                OpenApiTypes.INT, OpenApiParameter.QUERY,
+                required=False, default=CsvLoaderConstants.DEFAULT_BATCH_SIZE,
+                description=(
+                    "Rows per multi-row INSERT for the bulk engine "
+                    "(one transaction per entity)"
+                )
+            ),
+            OpenApiParameter(
+                "prewarm_id_registry",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Should ids already stored in the database be loaded up front "
+                    "(one query per table), so rows may link to them?"
+                )
+            ),
+            OpenApiParameter(
+                "parse_workers",
+                OpenApiTypes.INT, OpenApiParameter.QUERY,
+                required=False, default=1,
+                description=(
+                    "Number of processes that parse chunks of the file in parallel "
+                    "(orm and bulk engines)"
+                )
+            ),
+            OpenApiParameter(
+                "generate_workers",
+                OpenApiTypes.INT, OpenApiParameter.QUERY,
+                required=False, default=1,
+                description="Number of processes that generate shards of the CSV in parallel"
+            ),
+            OpenApiParameter(
+                "seed",
+                OpenApiTypes.INT, OpenApiParameter.QUERY,
+                required=False, default=None,
+                description="Seed for reproducible parallel generation"
+            ),
+            OpenApiParameter(
+                "personal_data_coverage",
+                OpenApiTypes.FLOAT, OpenApiParameter.QUERY,
+                required=False, default=1.0,
+                description="Share of generated accounts that get personal data (0.0 - 1.0)"
+            ),
+            OpenApiParameter(
+                "source",
+                OpenApiTypes.STR, OpenApiParameter.QUERY,
+                required=False, enum=CsvLoaderConstants.Sources.values,
+                default=CsvLoaderConstants.Sources.FILE,
+                description=(
+                    "Where rows come from: file (generate *filename* if needed, then parse it) "
+                    "or generator (stream generated rows straight to the database, "
+                    "orm and bulk engines only)"
+                )
+            ),
+            OpenApiParameter(
+                "tee_csv",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description="With the generator source, also write the generated rows to *filename*"
+            ),
+            OpenApiParameter(
+                "checkpoint",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Should every batch be committed together with a checkpoint (entity, "
+                    "byte offset, rows committed) of *filename*, so a failed load can be "
+                    "resumed? File source, orm and bulk engines, one write worker"
+                )
+            ),
+            OpenApiParameter(
+                "resume",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Continue a checkpointed load of *filename* from its last checkpoint, "
+                    "without reading the rows before it (implies *checkpoint*)"
+                )
+            ),
+            OpenApiParameter(
+                "incremental",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Should rows be upserted (orm and bulk engines, one write worker)? New ids "
+                    "are inserted, changed rows updated with INSERT ... ON CONFLICT DO UPDATE, "
+                    "unchanged rows skipped; counts per entity are reported. A row whose unique "
+                    "email is taken by another id fails the load, or goes to reject_file"
+                )
+            ),
+            OpenApiParameter(
+                "validate",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Should batches be validated column by column before they are written "
+                    "(orm and bulk engines)? Null, type, validator (cvv, expiration date, "
+                    "balance, password length, ...) and duplicate key and email checks; "
+                    "invalid rows go to reject_file if given, otherwise they fail the load"
+                )
+            ),
+            OpenApiParameter(
+                "hash_passwords",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Should plaintext passwords be hashed with PASSWORD_HASHERS before they are "
+                    "written (orm and bulk engines, not with incremental)? Values that already "
+                    "are password hashes are kept; hashes per second are reported"
+                )
+            ),
+            OpenApiParameter(
+                "hash_workers",
+                OpenApiTypes.INT, OpenApiParameter.QUERY,
+                required=False, default=1,
+                description="Number of processes to hash passwords with"
+            ),
+            OpenApiParameter(
+                "reject_file",
+                OpenApiTypes.STR, OpenApiParameter.QUERY,
+                required=False,
+                description=(
+                    "CSV file to write rows that fail to insert to, with the reason of the "
+                    "failure (orm and bulk engines). Failing batches are bisected down to the "
+                    "bad rows, the rest of the file is loaded; counts per entity are reported"
+                )
+            ),
+            OpenApiParameter(
+                "staging",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Should the dataset be loaded into staging tables, indexed there and "
+                    "swapped with the live tables in one short transaction, so readers never "
+                    "see a partial dataset? Replaces all data, so *flush_db* is not allowed. "
+                    "PostgreSQL only"
+                )
+            ),
+            OpenApiParameter(
+                "defer_indexes",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Should secondary indexes, unique constraints and foreign keys be dropped "
+                    "for the load and rebuilt (over *write_workers* connections) and "
+                    "analyzed afterwards? PostgreSQL only"
+                )
+            ),
+            OpenApiParameter(
+                "write_workers",
+                OpenApiTypes.INT, OpenApiParameter.QUERY,
+                required=False, default=1,
+                description=(
+                    "Number of database connections that write partitions of an entity "
+                    "concurrently (orm and bulk engines). Every partition is its own "
+                    "transaction; an entity starts once the entities it references are written"
+                )
+            ),
+            OpenApiParameter(
+                "pipeline",
+                OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                required=False, default=False,
+                description=(
+                    "Should batches be parsed in a background thread while previous ones are "
+                    "written (orm and bulk engines)? Time each stage spent blocked is reported"
+                )
+            ),
+            OpenApiParameter(
+                "queue_size",
+                OpenApiTypes.INT, OpenApiParameter.QUERY,
+                required=False, default=BatchPipeline.DEFAULT_QUEUE_SIZE,
+                description="Batches the pipeline buffers before the reader has to wait"
             )
         ],
         request=None,
         responses={
-            200: OpenApiResponse(response=HTTP_200_OK, description="Database is filled"),
+            202: OpenApiResponse(response=HTTP_202_ACCEPTED, description="Load job is started"),
             400: OpenApiResponse(description="Bad request"),
         },
         tags=GROUP_TAG
     )
     def post(self, request):
         """
-        Fills the database based on a generated CSV (also generates a CSV if it does not exist).
+        Starts filling the database based on a generated CSV (also generates a CSV if it does
+        not exist) in the background. Progress is reported by the returned status URL.
+        """
+        try:
+            progress = self.csv_loader_job_service.submit(**request.query_params)
+            return Response(
+                {
+                    "job_id": progress.job_id,
+                    "status_url": reverse(
+                        "csv_loader_job", kwargs={"job_id": progress.job_id}, request=request
+                    ),
+                },
+                status=HTTP_202_ACCEPTED
+            )
+        except ValidationError as e:
+            return Response({"message": e.message}, status=HTTP_400_BAD_REQUEST)
+
+
+class CsvLoaderJobAPIView(APIView):
+    """
+    CSV loader job view set.
+    """
+    GROUP_TAG = ["api-csv"]
+
+    def __init__(
+            self, csv_loader_job_service: CsvLoaderJobService = CsvLoaderJobService(),
+            *args, **kwargs
+    ):
+        super(CsvLoaderJobAPIView, self).__init__(**kwargs)
+        self.csv_loader_job_service = csv_loader_job_service
+
+    def dispatch(self, request, *args, **kwargs):
+        return super(CsvLoaderJobAPIView, self).dispatch(request, *args, **kwargs)
+
+    @inject
+    def setup(
+            self, request, csv_loader_job_service: CsvLoaderJobService = CsvLoaderJobService(),
+            *args, **kwargs
+    ):
+        super(CsvLoaderJobAPIView, self).setup(request, csv_loader_job_service, args, kwargs)
+
+    @extend_schema(
+        request=None,
+        responses={
+            200: OpenApiResponse(
+                response=HTTP_200_OK,
+                description="Phase, rows written per entity, rows total, rows/s and ETA"
+            ),
+            404: OpenApiResponse(description="Job not found"),
+        },
+        tags=GROUP_TAG
+    )
+    def get(self, request, job_id):
+        """
+        Returns the progress of a load job.
+        """
+        try:
+            progress = self.csv_loader_job_service.get(job_id)
+            return Response(progress.to_dict(), status=HTTP_200_OK)
+        except ObjectDoesNotExistError as e:
+            return Response({"message": e.message}, status=HTTP_404_NOT_FOUND)
+
+    @extend_schema(
+        request=None,
+        responses={
+            202: OpenApiResponse(response=HTTP_202_ACCEPTED, description="Cancellation is requested"),
+            404: OpenApiResponse(description="Job not found"),
+        },
+        tags=GROUP_TAG
+    )
+    def delete(self, request, job_id):
+        """
+        Cancels a load job. The load stops at its next batch but is not rolled back:
+        what is already committed (every finished batch, or every row with the orm engine)
+        stays in the database, so a cancelled load leaves partial data. A load with the
+        checkpoint option can be resumed.
         """
-        self.csv_loader_service.load(**request.query_params)
-        return Response(
-            {"message": "Database is filled"}, status=HTTP_200_OK
-        )
+        try:
+            progress = self.csv_loader_job_service.cancel(job_id)
+            return Response(progress.to_dict(), status=HTTP_202_ACCEPTED)
+        except ObjectDoesNotExistError as e:
+            return Response({"message": e.message}, status=HTTP_404_NOT_FOUND)
@@ -0,0 +1,166 @@
+""" Shared plumbing of the CSV management commands. """
+import contextlib
+import json
+import sys
+import threading
+import time
+from typing import Callable
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from paypal.domain.csv_logic import CsvLoadProgress
+from paypal.domain.csv_logic.constants import CsvLoaderConstants
+
+
+class ThroughputReporter:
+    """
+    Print the phase, rows done and the rows per second of the last interval of a running
+    CsvLoadProgress every *interval* seconds, from a background thread.
+    """
+
+    def __init__(self, progress: CsvLoadProgress, interval: float, stream=sys.stderr):
+        self.progress = progress
+        self.interval = interval
+        self.stream = stream
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._report, name="csv-progress", daemon=True)
+        super().__init__()
+
+    def _report(self) -> None:
+        last_rows = 0
+        last_time = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            rows = sum(self.progress.rows_done.values())
+            now = time.perf_counter()
+            total = f'/{self.progress.rows_total}' if self.progress.rows_total else ''
+            self.stream.write(
+                f'[{self.progress.phase}] {rows}{total} rows, '
+                f'{(rows - last_rows) / (now - last_time):.0f} rows/s\n'
+            )
+            self.stream.flush()
+            last_rows, last_time = rows, now
+
+    def __enter__(self) -> "ThroughputReporter":
+        if self.interval > 0:
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+class CsvCommand(BaseCommand):
+    """
+    Base of the commands that run a CsvLoaderService method.
+    The names in QUERY_PARAMS become --flags (described in ARGUMENTS) that are passed on as
+    query parameters of the same name, so the commands take the same options as the
+    csv-loader endpoint. Progress, and everything the service prints, goes to stderr while
+    the command runs; the summary with the phase timings is printed to stdout as one JSON
+    line at the end, so stdout can be parsed as JSON.
+    """
+
+    BOOL = {"action": "store_true"}
+    ARGUMENTS = {
+        "filename": {
+            "help": "CSV file name, compressed if it ends with .gz, a binary snapshot if it "
+                    "ends with .snap."
+        },
+        "rows_to_create": {"type": int, "help": "Number of rows to generate."},
+        "batch_size": {"type": int, "help": "Rows per batch."},
+        "engine": {
+            "choices": CsvLoaderConstants.Engines.values,
+            "help": "Database write engine (default: bulk with --batch-size, orm without).",
+        },
+        "flush_engine": {"choices": CsvLoaderConstants.FlushEngines.values},
+        "source": {"choices": CsvLoaderConstants.Sources.values},
+        "compression": {"choices": CsvLoaderConstants.Compressions.values},
+        "seed": {"type": int, "help": "Seed of the generated data."},
+        "personal_data_coverage": {"type": float},
+        "generate_workers": {"type": int, "help": "Processes that generate the CSV file."},
+        "parse_workers": {"type": int, "help": "Processes that parse the CSV file."},
+        "write_workers": {"type": int, "help": "Database connections that write rows."},
+        "hash_workers": {"type": int, "help": "Processes that hash passwords."},
+        "queue_size": {"type": int},
+        "convert_to": {
+            "help": "File to convert the parsed file to: a snapshot (.snap) for a CSV file, "
+                    "a CSV file for a snapshot."
+        },
+        "reject_file": {"help": "CSV file to collect rows that cannot be written in."},
+        "flush_db": BOOL,
+        "regenerate_file_if_exists": BOOL,
+        "prewarm_id_registry": BOOL,
+        "tee_csv": BOOL,
+        "pipeline": BOOL,
+        "staging": BOOL,
+        "defer_indexes": BOOL,
+        "checkpoint": BOOL,
+        "resume": BOOL,
+        "incremental": BOOL,
+        "validate": BOOL,
+        "hash_passwords": BOOL,
+    }
+    QUERY_PARAMS = []
+
+    def add_arguments(self, parser) -> None:
+        for name in self.QUERY_PARAMS:
+            parser.add_argument(
+                f'--{name.replace("_", "-")}', dest=name, **CsvCommand.ARGUMENTS[name]
+            )
+        parser.add_argument(
+            "--progress-interval", type=float, default=1.0,
+            help="Seconds between progress lines, 0 to disable them."
+        )
+
+    @classmethod
+    def _get_query_params(cls, options: dict, names: list) -> dict:
+        """
+        Turn the given flags into query parameters; flags that are not set are left out.
+        """
+        query_params = {}
+        for name in names:
+            value = options.get(name)
+            if value is None or value is False:
+                continue
+            query_params[name] = ['true' if value is True else str(value)]
+        return query_params
+
+    @classmethod
+    def _get_summary(cls, progress: CsvLoadProgress) -> dict:
+        """
+        Return the progress as a dict. Commands that do not load rows get their rows per
+        second over all their phases.
+        """
+        summary = progress.to_dict()
+        rows = sum(progress.rows_done.values())
+        busy_seconds = sum(
+            seconds for phase, seconds in progress.phase_seconds.items()
+            if phase != CsvLoaderConstants.JobPhases.QUEUED
+        )
+        summary["rows"] = rows
+        if summary["rows_per_second"] is None and busy_seconds:
+            summary["rows_per_second"] = rows / busy_seconds
+        return summary
+
+    def run(self, method: Callable, options: dict) -> None:
+        """
+        Call method(progress=..., **query params) while reporting its progress, with its
+        own output sent to stderr, then print the summary of the run as JSON.
+        """
+        progress = CsvLoadProgress()
+        query_params = CsvCommand._get_query_params(options, self.QUERY_PARAMS)
+        try:
+            with ThroughputReporter(progress, options["progress_interval"], self.stderr):
+                with contextlib.redirect_stdout(sys.stderr):
+                    result = method(progress=progress, **query_params)
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+        summary = CsvCommand._get_summary(progress)
+        if result is not None:
+            summary["result"] = result
+        self.stdout.write(json.dumps(summary, default=str))
@@ -0,0 +1,18 @@
+from paypal.api.management.base import CsvCommand
+from paypal.app_services import CsvLoaderService
+
+
+class Command(CsvCommand):
+    help = "Generate a CSV file with fake data, optionally compressed, or a snapshot."
+
+    QUERY_PARAMS = [
+        "filename",
+        "rows_to_create",
+        "seed",
+        "personal_data_coverage",
+        "generate_workers",
+        "compression",
+    ]
+
+    def handle(self, *args, **options) -> None:
+        self.run(CsvLoaderService().generate, options)
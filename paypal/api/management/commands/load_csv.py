@@ -0,0 +1,41 @@
+from paypal.api.management.base import CsvCommand
+from paypal.app_services import CsvLoaderService
+
+
+class Command(CsvCommand):
+    help = (
+        "Load a CSV file (generating it if needed) into the database, with the options of "
+        "the csv-loader endpoint."
+    )
+
+    QUERY_PARAMS = [
+        "filename",
+        "rows_to_create",
+        "engine",
+        "batch_size",
+        "source",
+        "seed",
+        "personal_data_coverage",
+        "generate_workers",
+        "parse_workers",
+        "write_workers",
+        "hash_workers",
+        "queue_size",
+        "flush_db",
+        "flush_engine",
+        "regenerate_file_if_exists",
+        "prewarm_id_registry",
+        "tee_csv",
+        "pipeline",
+        "staging",
+        "defer_indexes",
+        "checkpoint",
+        "resume",
+        "incremental",
+        "validate",
+        "hash_passwords",
+        "reject_file",
+    ]
+
+    def handle(self, *args, **options) -> None:
+        self.run(CsvLoaderService().load, options)
@@ -0,0 +1,19 @@
+from paypal.api.management.base import CsvCommand
+from paypal.app_services import CsvLoaderService
+
+
+class Command(CsvCommand):
+    help = (
+        "Parse a CSV file without loading it and report the rows of every entity, "
+        "optionally converting it to or from a snapshot."
+    )
+
+    QUERY_PARAMS = [
+        "filename",
+        "batch_size",
+        "parse_workers",
+        "convert_to",
+    ]
+
+    def handle(self, *args, **options) -> None:
+        self.run(CsvLoaderService().parse, options)
@@ -15,7 +15,10 @@ from paypal.api.banking.views import (
     BillingAddressViewSet,
     TransactionViewSet,
 )
-from paypal.api.csv_loader.views import CsvLoaderAPIView
+from paypal.api.csv_loader.views import (
+    CsvLoaderAPIView,
+    CsvLoaderJobAPIView,
+)
 
 
 router = routers.SimpleRouter()
@@ -36,6 +39,11 @@ urlpatterns = [
         r"csv-loader/load/",
         CsvLoaderAPIView.as_view(),
         name="csv_loader"
+    ),
+    path(
+        r"csv-loader/jobs/<uuid:job_id>/",
+        CsvLoaderJobAPIView.as_view(),
+        name="csv_loader_job"
     )
 ]
 
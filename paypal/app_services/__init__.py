@@ -1,5 +1,6 @@
 """ Business logic layer. Uses data access layer classes and other business logic classes. """
 from .csv_loader import CsvLoaderService
+from .csv_loader_jobs import CsvLoaderJobService
 from .paypal_account import PayPalAccountService
 from .account_personal_data import AccountPersonalDataService
 from .billing_address import BillingAddressService
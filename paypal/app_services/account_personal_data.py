@@ -5,6 +5,7 @@ from django.db.models import QuerySet
 from injector import inject
 
 from paypal.domain.account.models import AccountPersonalData
+from paypal.domain.account.password_hasher import PasswordHasher
 from paypal.domain.account.repositories import AccountPersonalDataRepository
 from paypal.domain.core.exceptions import (
     ObjectCannotBeDeletedError,
@@ -48,6 +49,12 @@ class AccountPersonalDataService:
         data.pop("account_id")
         return data
 
+    @classmethod
+    def _hash_password(cls, data: dict) -> dict:
+        if data.get("password"):
+            data["password"] = PasswordHasher().hash([data["password"]])[0]
+        return data
+
     def get_all(self) -> Optional[QuerySet[AccountPersonalData]]:
         return self.repo.get_all()
 
@@ -64,6 +71,7 @@ class AccountPersonalDataService:
             raise ValidationError("This email is already used.")
 
         data = AccountPersonalDataService._link_corresponding_paypal_account(data)
+        data = AccountPersonalDataService._hash_password(data)
         return self.repo.create(data)
 
     def update(self, account_id: str, data: dict) -> AccountPersonalData:
@@ -75,6 +83,7 @@ class AccountPersonalDataService:
             raise ObjectDoesNotExistError(
                 type=EntityVerbose.ACCOUNT_PERSONAL_DATA, id=account_id
             )
+        data = AccountPersonalDataService._hash_password(data)
         return self.repo.update(account_personal_data, data)
 
     def delete(self, account_id: str) -> Optional[AccountPersonalData]:
@@ -1,11 +1,28 @@
 import os
+import time
+from contextlib import nullcontext
+from itertools import (
+    chain,
+    groupby,
+)
+from operator import itemgetter
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
 
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from injector import inject
 
 from paypal.domain.account.models import (
     PayPalAccount,
     AccountPersonalData,
 )
+from paypal.domain.account.password_hasher import PasswordHasher
 from paypal.domain.account.repositories import (
     PayPalAccountRepository,
     AccountPersonalDataRepository,
@@ -20,11 +37,30 @@ from paypal.domain.banking.repositories import (
     CardRepository,
     TransactionRepository,
 )
-from paypal.domain.core.util import EntityVerbose
+from paypal.domain.core.abstract import AbstractRepository
+from paypal.domain.core.deferred_indexes import DeferredIndexes
+from paypal.domain.core.exceptions import InvalidRowsError
+from paypal.domain.core.parallel_writer import ParallelWriter
+from paypal.domain.core.registry import IdRegistry
+from paypal.domain.core.staging import StagingTables
+from paypal.domain.core.util import (
+    EntityVerbose,
+    chunked,
+)
 from paypal.domain.csv_logic import (
+    BatchValidator,
+    CsvCopyLoader,
     CsvGenerator,
+    CsvLoadProgress,
     CsvReader,
+    CsvRejectWriter,
+    CsvSnapshot,
 )
+from paypal.domain.csv_logic.compression import CsvCompression
+from paypal.domain.csv_logic.constants import CsvLoaderConstants
+from paypal.domain.csv_logic.csv_index import CsvSectionIndex
+from paypal.domain.csv_logic.pipeline import BatchPipeline
+from paypal.domain.csv_logic.repositories import CsvLoadCheckpointRepository
 
 
 class CsvLoaderService:
@@ -32,10 +68,14 @@ class CsvLoaderService:
 
     @inject
     def __init__(
-            self, csv_generator: CsvGenerator = CsvGenerator(), csv_reader: CsvReader = CsvReader()
+            self, csv_generator: CsvGenerator = CsvGenerator(), csv_reader: CsvReader = CsvReader(),
+            csv_copy_loader: CsvCopyLoader = CsvCopyLoader(),
+            checkpoint_repo: CsvLoadCheckpointRepository = CsvLoadCheckpointRepository()
     ):
         self.csv_generator = csv_generator
         self.csv_reader = csv_reader
+        self.csv_copy_loader = csv_copy_loader
+        self.checkpoint_repo = checkpoint_repo
         super().__init__()
 
     @classmethod
@@ -56,6 +96,15 @@ class CsvLoaderService:
             for i in range(len(entity_repos))
         }.get(class_name)
 
+    @classmethod
+    def _get_repository(cls, class_name: str, models: Optional[dict] = None):
+        """
+        Return an entity repository, writing to the table of its model in *models* if given
+        (e.g. a staging table).
+        """
+        repo = CsvLoaderService._map_class_name_to_repository(class_name)
+        return repo((models or {}).get(repo.BASE_CLASS))
+
     @classmethod
     def _map_class_name_to_obj(cls, class_name: str):
         """
@@ -69,64 +118,739 @@ class CsvLoaderService:
         }.get(class_name)
 
     @classmethod
-    def _parse_query_params(cls, **query_params) -> tuple:
-        filename = (
-            query_params.get("filename")[0]
-            if query_params.get("filename")
-            else 'generated.csv'
-        )
-        rows_to_create = (
-            int(query_params.get("rows_to_create")[0])
-            if query_params.get("rows_to_create")
-            else 1000
+    def _get_models(cls) -> list:
+        """
+        Return entity classes, parents first.
+        """
+        return [
+            CsvLoaderService._map_class_name_to_obj(class_name)
+            for class_name in EntityVerbose.get_verbose_names()
+        ]
+
+    @classmethod
+    def _get_query_param(cls, query_params: dict, name: str, default=None):
+        """
+        Return the first value of a query parameter, or *default* if it is missing.
+        """
+        value = query_params.get(name)
+        return value[0] if value else default
+
+    @classmethod
+    def _get_choice_query_param(
+            cls, query_params: dict, name: str, choices: list, default: str
+    ) -> str:
+        """
+        Return a query parameter that must be one of *choices*.
+        """
+        value = CsvLoaderService._get_query_param(query_params, name, default)
+        if value not in choices:
+            raise ValidationError(
+                message=f"Unknown {name}: {value}. Choose one of: {', '.join(choices)}."
+            )
+        return value
+
+    @classmethod
+    def _get_number_query_param(
+            cls, query_params: dict, name: str, default, number_type: type = int,
+            minimum: Optional[float] = 1, maximum: Optional[float] = None
+    ):
+        """
+        Return a query parameter that must be a number of *number_type* within
+        [minimum, maximum] (either bound may be None).
+        """
+        value = CsvLoaderService._get_query_param(query_params, name)
+        if value is None:
+            return default
+        try:
+            number = number_type(value)
+        except (TypeError, ValueError):
+            raise ValidationError(message=f"{name} must be a number, got: {value}.")
+        if minimum is not None and not number >= minimum:
+            raise ValidationError(message=f"{name} must be at least {minimum}, got: {value}.")
+        if maximum is not None and not number <= maximum:
+            raise ValidationError(message=f"{name} must be at most {maximum}, got: {value}.")
+        return number
+
+    @classmethod
+    def _parse_query_params(cls, **query_params) -> dict:
+        get_param = CsvLoaderService._get_query_param
+        get_number = CsvLoaderService._get_number_query_param
+        batch_size = get_param(query_params, "batch_size")
+        write_workers = get_number(query_params, "write_workers", 1)
+        engine = CsvLoaderService._get_choice_query_param(
+            query_params, "engine", CsvLoaderConstants.Engines.values,
+            CsvLoaderConstants.Engines.BULK if batch_size else CsvLoaderConstants.Engines.ORM
         )
-        flush_db = (
-            True if query_params.get("flush_db")[0] == 'true'
-            else False
+        flush_engine = CsvLoaderService._get_choice_query_param(
+            query_params, "flush_engine", CsvLoaderConstants.FlushEngines.values,
+            CsvLoaderConstants.FlushEngines.TRUNCATE
         )
-        regenerate_file_if_exists = (
-            True if query_params.get("regenerate_file_if_exists")[0] == 'true'
-            else False
+        source = CsvLoaderService._get_choice_query_param(
+            query_params, "source", CsvLoaderConstants.Sources.values,
+            CsvLoaderConstants.Sources.FILE
         )
-        return filename, rows_to_create, flush_db, regenerate_file_if_exists
+        if (
+                source == CsvLoaderConstants.Sources.GENERATOR
+                and engine == CsvLoaderConstants.Engines.COPY
+        ):
+            raise ValidationError(message="copy engine can only load from a file source.")
+        filename = get_param(query_params, "filename", CsvLoaderConstants.DEFAULT_FILENAME)
+        if engine == CsvLoaderConstants.Engines.COPY and CsvSnapshot.is_snapshot(filename):
+            raise ValidationError(
+                message="copy engine streams CSV text, convert the snapshot to CSV first."
+            )
+        staging = get_param(query_params, "staging") == 'true'
+        if staging and get_param(query_params, "flush_db") == 'true':
+            raise ValidationError(
+                message="staging replaces the tables as a whole, flush_db cannot be used with it."
+            )
+        resume = get_param(query_params, "resume") == 'true'
+        checkpoint = resume or get_param(query_params, "checkpoint") == 'true'
+        if checkpoint and (
+                engine == CsvLoaderConstants.Engines.COPY
+                or source != CsvLoaderConstants.Sources.FILE or staging
+                or get_param(query_params, "incremental") == 'true'
+                or write_workers > 1
+        ):
+            raise ValidationError(
+                message=(
+                    "checkpointed loads read a file with the orm or bulk engine on one "
+                    "connection and cannot be used with staging or incremental import."
+                )
+            )
+        if checkpoint and (
+                CsvCompression.is_compressed(filename) or CsvSnapshot.is_snapshot(filename)
+        ):
+            raise ValidationError(
+                message="checkpoints are byte offsets of a plain CSV file, convert the file first."
+            )
+        if resume and (
+                get_param(query_params, "flush_db") == 'true'
+                or get_param(query_params, "regenerate_file_if_exists") == 'true'
+        ):
+            raise ValidationError(
+                message=(
+                    "resume continues a load, flush_db and regenerate_file_if_exists cannot "
+                    "be used with it."
+                )
+            )
+        incremental = get_param(query_params, "incremental") == 'true'
+        if incremental and (
+                engine == CsvLoaderConstants.Engines.COPY or staging
+                or write_workers > 1
+        ):
+            raise ValidationError(
+                message=(
+                    "incremental import runs on one connection with the orm or bulk engine "
+                    "and cannot be used with staging."
+                )
+            )
+        reject_file = get_param(query_params, "reject_file")
+        if reject_file and engine == CsvLoaderConstants.Engines.COPY:
+            raise ValidationError(
+                message="rejected rows can only be collected with the orm or bulk engine."
+            )
+        validate = get_param(query_params, "validate") == 'true'
+        if validate and engine == CsvLoaderConstants.Engines.COPY:
+            raise ValidationError(message="rows can only be validated with the orm or bulk engine.")
+        hash_passwords = get_param(query_params, "hash_passwords") == 'true'
+        if hash_passwords and (engine == CsvLoaderConstants.Engines.COPY or incremental):
+            raise ValidationError(
+                message=(
+                    "passwords can only be hashed with the orm or bulk engine. Incremental "
+                    "import would salt every password anew and update every row, store "
+                    "hashed passwords in the file instead."
+                )
+            )
+        return {
+            "filename": filename,
+            "rows_to_create": get_number(
+                query_params, "rows_to_create", CsvLoaderConstants.DEFAULT_ROWS_TO_CREATE
+            ),
+            "flush_db": get_param(query_params, "flush_db") == 'true',
+            "flush_engine": flush_engine,
+            "regenerate_file_if_exists": (
+                get_param(query_params, "regenerate_file_if_exists") == 'true'
+            ),
+            "engine": engine,
+            "batch_size": get_number(
+                query_params, "batch_size", CsvLoaderConstants.DEFAULT_BATCH_SIZE
+            ),
+            "prewarm_id_registry": get_param(query_params, "prewarm_id_registry") == 'true',
+            "parse_workers": get_number(query_params, "parse_workers", 1),
+            "generate_workers": get_number(query_params, "generate_workers", 1),
+            "seed": get_number(query_params, "seed", None, minimum=None),
+            "personal_data_coverage": get_number(
+                query_params, "personal_data_coverage", 1.0, float, minimum=0, maximum=1
+            ),
+            "source": source,
+            "tee_csv": get_param(query_params, "tee_csv") == 'true',
+            "pipeline": get_param(query_params, "pipeline") == 'true',
+            "staging": staging,
+            "checkpoint": checkpoint,
+            "resume": resume,
+            "incremental": incremental,
+            "defer_indexes": get_param(query_params, "defer_indexes") == 'true',
+            "write_workers": write_workers,
+            "reject_file": reject_file,
+            "validate": validate,
+            "hash_passwords": hash_passwords,
+            "hash_workers": get_number(query_params, "hash_workers", 1),
+            "queue_size": get_number(query_params, "queue_size", BatchPipeline.DEFAULT_QUEUE_SIZE),
+        }
 
-    def load(self, **query_params) -> None:
+    @classmethod
+    def _flush_db(cls, flush_engine: str) -> float:
         """
-        Generate CSV, parse it, and populate the database with data from the file.
+        Empty the domain tables: with one TRUNCATE if possible, otherwise table by table
+        with DELETE. Return the elapsed time in seconds.
         """
-        filename, rows_to_create, flush_db, regenerate_file_if_exists = (
-            CsvLoaderService._parse_query_params(**query_params)
-        )
-
-        if flush_db:
-            for class_name in EntityVerbose.get_verbose_names_in_truncate_order():
-                repo = CsvLoaderService._map_class_name_to_repository(class_name)
+        started = time.perf_counter()
+        repos = [
+            CsvLoaderService._map_class_name_to_repository(class_name)
+            for class_name in EntityVerbose.get_verbose_names_in_truncate_order()
+        ]
+        if not (
+                flush_engine == CsvLoaderConstants.FlushEngines.TRUNCATE
+                and AbstractRepository.truncate(repos)
+        ):
+            flush_engine = CsvLoaderConstants.FlushEngines.DELETE
+            for repo in repos:
                 repo().delete_all()
-            print('Performed database reset.')
+        elapsed = time.perf_counter() - started
+        print(f'Performed database reset ({flush_engine}) in {elapsed:.2f}s.')
+        return elapsed
+
+    @classmethod
+    def _get_rows_to_generate(cls, options: dict) -> int:
+        """
+        Return the number of rows the generator writes for the given options.
+        """
+        rows_per_entity = options["rows_to_create"] // 5
+        return rows_per_entity * 4 + round(rows_per_entity * options["personal_data_coverage"])
+
+    @classmethod
+    def _get_dependency_levels(cls) -> dict:
+        """
+        Return the level of every entity in the FK dependency DAG: an entity only references
+        entities of lower levels, so entities of one level can be written at the same time.
+        """
+        levels = {}
+        for class_name in EntityVerbose.get_verbose_names():
+            model = CsvLoaderService._map_class_name_to_obj(class_name)
+            levels[model] = 1 + max(
+                (
+                    levels[field.related_model]
+                    for field in model._meta.concrete_fields
+                    if field.is_relation and field.related_model in levels
+                ),
+                default=-1
+            )
+        return {
+            class_name: levels[CsvLoaderService._map_class_name_to_obj(class_name)]
+            for class_name in EntityVerbose.get_verbose_names()
+        }
+
+    @classmethod
+    def _get_reject_callback(
+            cls, class_name: str, rejects: Optional[CsvRejectWriter],
+            progress: Optional[CsvLoadProgress] = None
+    ) -> Optional[Callable[[dict, str], None]]:
+        """
+        Return the callback that collects a row rejected while writing, and takes it back
+        from the rows counted in *progress*.
+        """
+        if rejects is None:
+            return None
+
+        def on_reject(row: dict, reason: str) -> None:
+            rejects.add(class_name, row, reason)
+            if progress:
+                progress.remove_rows(class_name, 1)
+        return on_reject
+
+    @classmethod
+    def _create_row(
+            cls, repo: AbstractRepository, row: dict, id_registry: IdRegistry,
+            on_reject: Optional[Callable[[dict, str], None]] = None
+    ) -> bool:
+        """
+        Create one row. If *on_reject* is given, a row that cannot be written is rolled back
+        to a savepoint and passed to on_reject(row, reason) instead of aborting the load.
+        Return whether the row was created.
+        """
+        if not on_reject:
+            repo.create(row, id_registry)
+            return True
+        try:
+            with transaction.atomic():
+                repo.create(dict(row), id_registry)
+        except AbstractRepository.REJECTABLE_ERRORS as e:
+            on_reject(row, AbstractRepository.get_reject_reason(e))
+            return False
+        return True
+
+    @classmethod
+    def _write_rows(
+            cls, class_name: str, rows: list, batch_size: Optional[int], id_registry: IdRegistry,
+            models: Optional[dict] = None, rejects: Optional[CsvRejectWriter] = None,
+            progress: Optional[CsvLoadProgress] = None
+    ) -> int:
+        """
+        Write a partition of an entity's rows in one transaction, then count the rows that
+        were written in *progress*, so it never runs ahead of the database.
+        Return the number of written rows.
+        """
+        repo = CsvLoaderService._get_repository(class_name, models)
+        on_reject = CsvLoaderService._get_reject_callback(class_name, rejects)
+        if batch_size:
+            written = repo.bulk_create(rows, batch_size, id_registry, on_reject)
+        else:
+            with transaction.atomic():
+                written = sum(
+                    CsvLoaderService._create_row(repo, row, id_registry, on_reject)
+                    for row in rows
+                )
+        if progress:
+            progress.add_rows(class_name, written)
+        return written
+
+    @classmethod
+    def _populate_in_parallel(
+            cls, parsed_data: Iterable[tuple], batch_size: Optional[int],
+            id_registry: IdRegistry, progress: CsvLoadProgress, write_workers: int,
+            models: Optional[dict] = None, rejects: Optional[CsvRejectWriter] = None
+    ) -> None:
+        """
+        Split every entity into partitions of *batch_size* rows and write them over
+        *write_workers* connections, one FK dependency level after another.
+        Rows are counted in *progress* by the writers, once their partition is committed.
+        """
+        levels = CsvLoaderService._get_dependency_levels()
+        partition_size = batch_size or CsvLoaderConstants.DEFAULT_BATCH_SIZE
+        with ParallelWriter(write_workers) as writer:
+            for class_name, rows in parsed_data:
+                for partition in chunked(rows, partition_size):
+                    progress.check_cancelled()
+                    writer.submit(
+                        levels[class_name], CsvLoaderService._write_rows,
+                        class_name, partition, batch_size, id_registry, models, rejects,
+                        progress
+                    )
+        print(f'Written with {write_workers} connections.')
+
+    @classmethod
+    def _validate_rows(
+            cls, validators: dict, class_name: str, rows: list,
+            rejects: Optional[CsvRejectWriter] = None
+    ) -> list:
+        """
+        Validate a batch before it is written and return its valid rows.
+        Invalid rows are added to *rejects*, or fail the load if it is not given.
+        """
+        if class_name not in validators:
+            validators[class_name] = BatchValidator(
+                CsvLoaderService._map_class_name_to_obj(class_name)
+            )
+        errors = validators[class_name].validate(rows)
+        if not errors:
+            return rows
+        reasons = BatchValidator.get_reasons(errors, len(rows))
+        if rejects is None:
+            raise InvalidRowsError(
+                class_name, sum(reason is not None for reason in reasons),
+                [
+                    f'{name}: {check} ({sum(mask)})'
+                    for name, column_errors in errors.items() for check, mask in column_errors
+                ]
+            )
+        valid_rows = []
+        for row, reason in zip(rows, reasons):
+            if reason:
+                rejects.add(class_name, row, reason)
+            else:
+                valid_rows.append(row)
+        return valid_rows
+
+    @classmethod
+    def _validate_batches(
+            cls, batches: Iterable[tuple], rejects: Optional[CsvRejectWriter] = None
+    ) -> Iterator[tuple]:
+        validators = {}
+        for class_name, rows in batches:
+            yield class_name, CsvLoaderService._validate_rows(
+                validators, class_name, rows, rejects
+            )
 
-        if regenerate_file_if_exists:
+    @classmethod
+    def _hash_passwords(cls, class_name: str, rows: list, hasher: PasswordHasher) -> list:
+        if class_name == EntityVerbose.ACCOUNT_PERSONAL_DATA:
+            hasher.hash_rows(rows)
+        return rows
+
+    @classmethod
+    def _hash_batches(cls, batches: Iterable[tuple], hasher: PasswordHasher) -> Iterator[tuple]:
+        for class_name, rows in batches:
+            yield class_name, CsvLoaderService._hash_passwords(class_name, rows, hasher)
+
+    @classmethod
+    def _track_batches(cls, batches: Iterable[tuple], progress: CsvLoadProgress) -> Iterator[list]:
+        """
+        Pass batches through, counting the rows of every batch once it has been consumed.
+        Batches come filtered by validation; rows rejected while writing are taken back by
+        the reject callback.
+        """
+        for class_name, batch in batches:
+            yield batch
+            progress.add_rows(class_name, len(batch))
+
+    def _generate_file(
+            self, filename: str, options: dict, progress: Optional[CsvLoadProgress] = None
+    ) -> None:
+        """
+        Generate *filename*. A snapshot is converted from a CSV file generated next to it.
+        """
+        if not CsvSnapshot.is_snapshot(filename):
+            self.csv_generator.generate_csv(
+                filename, options["rows_to_create"], options["generate_workers"],
+                options["seed"], options["personal_data_coverage"], progress
+            )
+            return
+        csv_filename = f'{filename}.csv'
+        try:
+            self._generate_file(csv_filename, options, progress)
+            self.csv_reader.write_snapshot(csv_filename, filename)
+        finally:
+            if os.path.exists(csv_filename):
+                os.remove(csv_filename)
+
+    def _prepare_file(self, options: dict, progress: CsvLoadProgress) -> None:
+        """
+        Generate the CSV file unless it already exists (or should be regenerated).
+        The rows to load are known for a generated file and counted for an existing one
+        when that is cheap; otherwise they stay unknown, and so does the ETA.
+        """
+        filename = options["filename"]
+        if options["regenerate_file_if_exists"]:
             if os.path.exists(f'{filename}'):
                 os.remove(f'{filename}')
                 print(f'Removed previous {filename}.')
 
         if not os.path.exists(f'{filename}'):
-            self.csv_generator.generate_csv(filename, rows_to_create)
+            progress.set_phase(CsvLoaderConstants.JobPhases.GENERATING)
+            self._generate_file(filename, options)
+            progress.rows_total = CsvLoaderService._get_rows_to_generate(options)
         else:
             print(f'Found {filename}.')
+            progress.rows_total = CsvSectionIndex.count_rows_if_cheap(filename)
+
+    def _iter_batches(self, options: dict, progress: CsvLoadProgress) -> Iterator[tuple]:
+        """
+        Return the (entity name, rows) batches to populate the database with: parsed from the
+        CSV file, or streamed straight from the generator with no intermediate file
+        (optionally tee'd to *filename*).
+        """
+        if options["source"] == CsvLoaderConstants.Sources.GENERATOR:
+            progress.rows_total = CsvLoaderService._get_rows_to_generate(options)
+            return (
+                (entity_name, [dict(zip(header, row)) for row in rows])
+                for entity_name, header, rows in self.csv_generator.iter_batches(
+                    options["rows_to_create"], options["batch_size"], options["seed"],
+                    options["personal_data_coverage"],
+                    tee_filename=options["filename"] if options["tee_csv"] else None
+                )
+            )
+
+        self._prepare_file(options, progress)
+        return self.csv_reader.iter_batches(
+            options["filename"], options["batch_size"], options["parse_workers"]
+        )
+
+    def _load_rows(
+            self, options: dict, progress: CsvLoadProgress, models: Optional[dict] = None
+    ) -> None:
+        """
+        Load the rows with the chosen engine, into the tables of *models* if given.
+        """
+        if options["engine"] == CsvLoaderConstants.Engines.COPY:
+            self._prepare_file(options, progress)
+            progress.set_phase(CsvLoaderConstants.JobPhases.LOADING)
+            self.csv_copy_loader.load(options["filename"], progress, models)
+            return
 
-        parsed_data = self.csv_reader.parse(filename)
+        if options["checkpoint"]:
+            self._load_rows_with_checkpoints(options, progress)
+            return
 
-        self.populate(parsed_data)
+        id_registry = IdRegistry()
+        if (options["prewarm_id_registry"] or options["incremental"]) and not models:
+            id_registry.prewarm(CsvLoaderService._get_models())
+
+        rejects = CsvRejectWriter(options["reject_file"]) if options["reject_file"] else None
+        hasher = PasswordHasher(options["hash_workers"]) if options["hash_passwords"] else None
+        batches = self._iter_batches(options, progress)
+        if options["validate"]:
+            batches = CsvLoaderService._validate_batches(batches, rejects)
+        if hasher:
+            batches = CsvLoaderService._hash_batches(batches, hasher)
+        pipeline = None
+        if options["pipeline"]:
+            batches = pipeline = BatchPipeline(batches, options["queue_size"])
+
+        progress.set_phase(CsvLoaderConstants.JobPhases.LOADING)
+        try:
+            with hasher or nullcontext():
+                upsert_summary = self.populate(
+                    batches,
+                    options["batch_size"]
+                    if options["engine"] == CsvLoaderConstants.Engines.BULK else None,
+                    id_registry, progress, options["write_workers"], models,
+                    options["incremental"], rejects
+                )
+        finally:
+            if rejects:
+                rejects.close()
+                progress.rejected = rejects.counts
+            if hasher:
+                progress.hashes_per_second = hasher.get_hashes_per_second()
+        if options["incremental"]:
+            progress.upsert_summary = upsert_summary
+        if pipeline:
+            progress.blocked_seconds = pipeline.get_blocked_seconds()
+            print(
+                f'Pipeline took {pipeline.elapsed:.2f}s: reader blocked on a full queue for '
+                f'{pipeline.producer_blocked:.2f}s, writer blocked on an empty queue for '
+                f'{pipeline.consumer_blocked:.2f}s.'
+            )
+
+    def _load_rows_with_checkpoints(self, options: dict, progress: CsvLoadProgress) -> None:
+        """
+        Load the file batch by batch, committing every batch together with a checkpoint of
+        where it ended. With the resume option, reading starts at the stored checkpoint.
+        The checkpoint is removed once the whole file is loaded.
+        """
+        filename = options["filename"]
+        self._prepare_file(options, progress)
+        checkpoint = self.checkpoint_repo.get_by_filename(filename) if options["resume"] else None
+        id_registry = IdRegistry()
+        rows_committed = 0
+        if checkpoint:
+            if checkpoint.file_size != os.path.getsize(filename):
+                raise ValidationError(
+                    message=f"{filename} has changed since its checkpoint, it cannot be resumed."
+                )
+            rows_committed = checkpoint.rows_committed
+            if progress.rows_total is not None:
+                progress.rows_total = max(progress.rows_total - rows_committed, 0)
+            id_registry.prewarm(CsvLoaderService._get_models())
+            print(
+                f'Resuming {filename} in {checkpoint.entity} at byte {checkpoint.offset}, '
+                f'{rows_committed} rows committed.'
+            )
+        else:
+            self.checkpoint_repo.delete_by_filename(filename)
+            if options["prewarm_id_registry"]:
+                id_registry.prewarm(CsvLoaderService._get_models())
+
+        batch_size = (
+            options["batch_size"] if options["engine"] == CsvLoaderConstants.Engines.BULK else None
+        )
+        progress.set_phase(CsvLoaderConstants.JobPhases.LOADING)
+        rejects = CsvRejectWriter(options["reject_file"]) if options["reject_file"] else None
+        hasher = PasswordHasher(options["hash_workers"]) if options["hash_passwords"] else None
+        validators = {}
+        print('Writing to DB...')
+        try:
+            with hasher or nullcontext():
+                for class_name, rows, offset in self.csv_reader.iter_resumable_batches(
+                        filename, options["batch_size"],
+                        checkpoint.offset if checkpoint else 0,
+                        checkpoint.entity if checkpoint else None
+                ):
+                    rows_read = len(rows)
+                    if options["validate"]:
+                        rows = CsvLoaderService._validate_rows(
+                            validators, class_name, rows, rejects
+                        )
+                    if hasher:
+                        rows = CsvLoaderService._hash_passwords(class_name, rows, hasher)
+                    with transaction.atomic():
+                        written = CsvLoaderService._write_rows(
+                            class_name, rows, batch_size, id_registry, rejects=rejects
+                        )
+                        rows_committed += rows_read
+                        self.checkpoint_repo.record(
+                            filename, class_name, offset, rows_committed
+                        )
+                    progress.add_rows(class_name, written)
+        finally:
+            if rejects:
+                rejects.close()
+                progress.rejected = rejects.counts
+            if hasher:
+                progress.hashes_per_second = hasher.get_hashes_per_second()
+        self.checkpoint_repo.delete_by_filename(filename)
+        print(f'Database filled, {rows_committed} rows committed.')
+
+    def _load_into_staging_tables(self, options: dict, progress: CsvLoadProgress) -> None:
+        """
+        Load the rows into staging tables and swap them with the live tables at the end.
+        Staging tables of a failed or cancelled load are dropped; the live tables stay as
+        they were.
+        """
+        staging_tables = StagingTables(CsvLoaderService._get_models(), options["write_workers"])
+        staging_tables.create()
+        try:
+            self._load_rows(options, progress, staging_tables.models)
+            progress.set_phase(CsvLoaderConstants.JobPhases.INDEXING)
+            started = time.perf_counter()
+            progress.swap_seconds = staging_tables.swap()
+            progress.index_seconds = time.perf_counter() - started - progress.swap_seconds
+        except BaseException:
+            staging_tables.discard()
+            raise
+
+    def load(self, progress: Optional[CsvLoadProgress] = None, **query_params) -> None:
+        """
+        Generate CSV, parse it, and populate the database with data from the file.
+        Phase and row counts are reported to *progress*, which can also cancel the load.
+        With the pipeline option, batches are parsed (or generated) in a background thread
+        while the previous ones are written.
+        With the defer_indexes option, secondary indexes and foreign keys are dropped for
+        the load and rebuilt afterwards, also if the load fails or is cancelled.
+        With the staging option, the live tables keep serving the old data until the new
+        dataset is fully loaded and indexed in staging tables, which then replace them.
+        """
+        options = CsvLoaderService._parse_query_params(**query_params)
+        progress = progress or CsvLoadProgress()
+
+        if options["staging"]:
+            self._load_into_staging_tables(options, progress)
+            progress.set_phase(CsvLoaderConstants.JobPhases.DONE)
+            return
+
+        if options["flush_db"]:
+            progress.set_phase(CsvLoaderConstants.JobPhases.FLUSHING)
+            progress.flush_seconds = CsvLoaderService._flush_db(options["flush_engine"])
+
+        deferred_indexes = None
+        if options["defer_indexes"]:
+            deferred_indexes = DeferredIndexes(
+                CsvLoaderService._get_models(), options["write_workers"]
+            )
+            deferred_indexes.drop()
+
+        try:
+            self._load_rows(options, progress)
+        finally:
+            if deferred_indexes:
+                progress.set_phase(CsvLoaderConstants.JobPhases.INDEXING, cancellable=False)
+                progress.index_seconds = deferred_indexes.rebuild()
+        progress.set_phase(CsvLoaderConstants.JobPhases.DONE)
+
+    def generate(self, progress: Optional[CsvLoadProgress] = None, **query_params) -> str:
+        """
+        Generate a CSV file without loading it, optionally compressed (also when *filename*
+        has a compression extension), or a snapshot when *filename* ends with .snap.
+        Return the name of the written file.
+        """
+        options = CsvLoaderService._parse_query_params(**query_params)
+        compression = CsvLoaderService._get_choice_query_param(
+            query_params, "compression", CsvLoaderConstants.Compressions.values,
+            CsvLoaderConstants.Compressions.NONE
+        )
+        filename = CsvCompression.get_filename(options["filename"], compression)
+        progress = progress or CsvLoadProgress()
+        progress.rows_total = CsvLoaderService._get_rows_to_generate(options)
+        progress.set_phase(CsvLoaderConstants.JobPhases.GENERATING)
+        self._generate_file(filename, options, progress)
+        progress.set_phase(CsvLoaderConstants.JobPhases.DONE)
+        return filename
+
+    def parse(self, progress: Optional[CsvLoadProgress] = None, **query_params) -> Optional[str]:
+        """
+        Parse a CSV file without loading it, counting the rows of every entity in *progress*.
+        With *convert_to*, the rows are written to that file as well: a CSV file is converted
+        to a snapshot (.snap), a snapshot back to a CSV file. Return the converted file name.
+        """
+        options = CsvLoaderService._parse_query_params(**query_params)
+        filename = options["filename"]
+        convert_to = CsvLoaderService._get_query_param(query_params, "convert_to")
+        if convert_to and CsvSnapshot.is_snapshot(filename) == CsvSnapshot.is_snapshot(convert_to):
+            raise ValidationError(
+                message="convert_to converts a CSV file to a snapshot (.snap) or a snapshot to "
+                        "a CSV file."
+            )
+        progress = progress or CsvLoadProgress()
+        progress.rows_total = CsvSectionIndex.count_rows_if_cheap(filename)
+        progress.set_phase(CsvLoaderConstants.JobPhases.PARSING)
+        if convert_to and CsvSnapshot.is_snapshot(convert_to):
+            self.csv_reader.write_snapshot(filename, convert_to, progress)
+        elif convert_to:
+            CsvSnapshot.to_csv(filename, convert_to, progress)
+        else:
+            for entity_name, _, rows in self.csv_reader.iter_typed_batches(
+                    filename, options["batch_size"], options["parse_workers"]
+            ):
+                progress.add_rows(entity_name, len(rows))
+        progress.set_phase(CsvLoaderConstants.JobPhases.DONE)
+        return convert_to
 
     @classmethod
-    def populate(cls, parsed_data: dict) -> None:
+    def populate(
+            cls, parsed_data: Union[dict, Iterable[tuple]], batch_size: Optional[int] = None,
+            id_registry: Optional[IdRegistry] = None, progress: Optional[CsvLoadProgress] = None,
+            write_workers: int = 1, models: Optional[dict] = None, incremental: bool = False,
+            rejects: Optional[CsvRejectWriter] = None
+    ) -> dict:
         """
         Create entities and store them in the database.
+        *parsed_data* is either a dict of rows per entity or a stream of (entity name, rows)
+        batches as yielded by CsvReader.iter_batches.
+        If *batch_size* is set, every entity is written with batched multi-row INSERTs
+        inside one transaction, otherwise rows are created one by one.
+        Foreign keys are checked against *id_registry* instead of being fetched row by row.
+        With *write_workers* > 1, partitions of every entity are written concurrently,
+        each in its own transaction.
+        *models* maps models to the models whose tables should be written instead.
+        With *incremental*, rows are upserted: new ones inserted, changed ones updated,
+        unchanged ones skipped. Return the number of inserted, updated and skipped rows
+        per entity in that case.
+        With *rejects*, rows that cannot be written are added to it instead of aborting
+        the load.
         """
+        if isinstance(parsed_data, dict):
+            parsed_data = parsed_data.items()
+        id_registry = id_registry if id_registry is not None else IdRegistry()
+        progress = progress or CsvLoadProgress()
+        summary = {}
         print('Writing to DB...')
-        for class_name, rows in parsed_data.items():
-            repo = CsvLoaderService._map_class_name_to_repository(class_name)
-            for row in rows:
-                repo().create(row)
+        if write_workers > 1:
+            CsvLoaderService._populate_in_parallel(
+                parsed_data, batch_size, id_registry, progress, write_workers, models, rejects
+            )
+            print('Database filled.')
+            return {}
+        for class_name, batches in groupby(parsed_data, key=itemgetter(0)):
+            rows = chain.from_iterable(CsvLoaderService._track_batches(batches, progress))
+            repo = CsvLoaderService._get_repository(class_name, models)
+            on_reject = CsvLoaderService._get_reject_callback(class_name, rejects, progress)
+            if incremental:
+                summary[class_name] = repo.upsert(
+                    rows, batch_size or CsvLoaderConstants.DEFAULT_BATCH_SIZE, id_registry,
+                    on_reject
+                )
+                print(
+                    f'{class_name} - OK: {summary[class_name]["inserted"]} inserted, '
+                    f'{summary[class_name]["updated"]} updated, '
+                    f'{summary[class_name]["skipped"]} unchanged.'
+                )
+                continue
+            if batch_size:
+                repo.bulk_create(rows, batch_size, id_registry, on_reject)
+            else:
+                for row in rows:
+                    CsvLoaderService._create_row(repo, row, id_registry, on_reject)
             print(f'{class_name} - OK')
         print('Database filled.')
+        return summary
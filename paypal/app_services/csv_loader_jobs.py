@@ -0,0 +1,86 @@
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from injector import inject
+
+from paypal.app_services.csv_loader import CsvLoaderService
+from paypal.domain.core.exceptions import (
+    LoadCancelledError,
+    ObjectDoesNotExistError,
+)
+from paypal.domain.csv_logic import CsvLoadProgress
+from paypal.domain.csv_logic.constants import CsvLoaderConstants
+
+
+class CsvLoaderJobService:
+    """ Run database loads in background threads and keep track of their progress. """
+
+    _jobs = {}
+    _lock = threading.Lock()
+    _executor = ThreadPoolExecutor(
+        max_workers=CsvLoaderConstants.JOB_WORKERS, thread_name_prefix="csv-loader-job"
+    )
+
+    @inject
+    def __init__(self, csv_loader_service: CsvLoaderService = CsvLoaderService()):
+        self.csv_loader_service = csv_loader_service
+        super().__init__()
+
+    @classmethod
+    def _forget_finished_jobs(cls) -> None:
+        """
+        Drop the oldest finished jobs beyond FINISHED_JOBS_TO_KEEP.
+        """
+        finished = sorted(
+            (progress for progress in cls._jobs.values() if progress.is_finished),
+            key=lambda progress: progress.finished_at
+        )
+        for progress in finished[:-CsvLoaderConstants.FINISHED_JOBS_TO_KEEP or None]:
+            del cls._jobs[progress.job_id]
+
+    def _run(self, progress: CsvLoadProgress, query_params: dict) -> None:
+        try:
+            self.csv_loader_service.load(progress=progress, **query_params)
+        except LoadCancelledError:
+            progress.set_phase(CsvLoaderConstants.JobPhases.CANCELLED)
+        except Exception as e:
+            print(f'CSV loader job {progress.job_id} failed:')
+            traceback.print_exc()
+            progress.error = getattr(e, "message", None) or f'{type(e).__name__}: {e}'
+            progress.set_phase(CsvLoaderConstants.JobPhases.FAILED)
+        finally:
+            connection.close()
+
+    def submit(self, **query_params) -> CsvLoadProgress:
+        """
+        Validate the load options and start the load in the background.
+        Invalid options raise ValidationError right away instead of failing the job.
+        """
+        CsvLoaderService._parse_query_params(**query_params)
+        progress = CsvLoadProgress(job_id=str(uuid.uuid4()))
+        with CsvLoaderJobService._lock:
+            CsvLoaderJobService._forget_finished_jobs()
+            CsvLoaderJobService._jobs[progress.job_id] = progress
+        CsvLoaderJobService._executor.submit(self._run, progress, query_params)
+        return progress
+
+    def get(self, job_id: str) -> CsvLoadProgress:
+        progress = CsvLoaderJobService._jobs.get(str(job_id))
+        if progress is None:
+            raise ObjectDoesNotExistError(type="Load job", id=job_id)
+        return progress
+
+    def cancel(self, job_id: str) -> CsvLoadProgress:
+        """
+        Ask a job to stop. The load stops at its next batch but is not rolled back:
+        what is already committed (every finished batch, or every row with the orm engine)
+        stays in the database, so a cancelled load leaves partial data. A load with the
+        checkpoint option can be resumed.
+        """
+        progress = self.get(job_id)
+        if not progress.is_finished:
+            progress.cancel()
+        return progress
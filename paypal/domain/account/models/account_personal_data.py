@@ -22,7 +22,7 @@ class AccountPersonalData(models.Model):
     country = models.CharField(max_length=255, blank=True)
     phone_number = models.CharField(max_length=16, blank=True)
     avatar = models.ImageField(blank=True, upload_to="accounts/icons")
-    password = models.CharField(max_length=48, validators=[MinLengthValidator(8)])
+    password = models.CharField(max_length=128, validators=[MinLengthValidator(8)])
     email = models.EmailField(validators=[EmailValidator()], unique=True)
 
     REQUIRED_FIELDS = ['account', 'email', 'password']
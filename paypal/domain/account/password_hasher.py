@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import (
+    identify_hasher,
+    make_password,
+)
+
+from paypal.domain.core.util import chunked
+
+
+def init_hash_worker() -> None:
+    """
+    Load the settings (and so PASSWORD_HASHERS) in a worker process started without fork.
+    """
+    if not apps.ready:
+        django.setup()
+
+
+def hash_chunk(passwords: list) -> list:
+    return [make_password(password) for password in passwords]
+
+
+class PasswordHasher:
+    """
+    Hash batches of passwords with the configured PASSWORD_HASHERS, spreading them over
+    a pool of *workers* processes, since every hash is deliberately CPU-bound.
+    Values that already are password hashes are kept as they are when the caller trusts
+    its source (the loader, reading a file that may store hashes).
+    Use as a context manager to own the pool; with one worker, passwords are hashed
+    in the calling process.
+    """
+
+    CHUNK_SIZE = 16
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self.hashed = 0
+        self.elapsed = 0.0
+        self._executor = None
+        super().__init__()
+
+    @classmethod
+    def is_hashed(cls, value: str) -> bool:
+        try:
+            identify_hasher(value)
+        except ValueError:
+            return False
+        return True
+
+    def get_hashes_per_second(self) -> Optional[float]:
+        if not self.elapsed:
+            return None
+        return round(self.hashed / self.elapsed, 1)
+
+    def hash(self, passwords: list, trust_hashed: bool = False) -> list:
+        """
+        Return the hashes of *passwords*, in order. Empty values are returned unchanged,
+        and so are already hashed values with *trust_hashed*. Without it, every value is
+        hashed: a value that merely looks like a hash must not be stored as one.
+        """
+        started = time.perf_counter()
+        positions = [
+            i for i, password in enumerate(passwords)
+            if password and not (trust_hashed and PasswordHasher.is_hashed(password))
+        ]
+        plain = [passwords[i] for i in positions]
+        if self._executor is not None and len(plain) > PasswordHasher.CHUNK_SIZE:
+            hashes = [
+                password_hash
+                for hashed_chunk in self._executor.map(
+                    hash_chunk, chunked(plain, PasswordHasher.CHUNK_SIZE)
+                )
+                for password_hash in hashed_chunk
+            ]
+        else:
+            hashes = hash_chunk(plain)
+        hashed = list(passwords)
+        for i, password_hash in zip(positions, hashes):
+            hashed[i] = password_hash
+        self.hashed += len(hashes)
+        self.elapsed += time.perf_counter() - started
+        return hashed
+
+    def hash_rows(self, rows: list, column: str = "password") -> list:
+        """
+        Replace the passwords of row dicts with their hashes; hashes already stored in the
+        rows are kept.
+        """
+        for row, password_hash in zip(
+                rows, self.hash([row[column] for row in rows], trust_hashed=True)
+        ):
+            row[column] = password_hash
+        return rows
+
+    def __enter__(self) -> "PasswordHasher":
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=init_hash_worker
+            )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self.hashed:
+            print(
+                f'Hashed {self.hashed} passwords in {self.elapsed:.2f}s '
+                f'({self.get_hashes_per_second()} hashes/s).'
+            )
@@ -9,6 +9,7 @@ from paypal.domain.core.abstract import AbstractRepository
 from paypal.domain.core.exceptions import (
     ObjectMustBeLinkedError
 )
+from paypal.domain.core.registry import IdRegistry
 from paypal.domain.core.util import EntityVerbose
 
 
@@ -31,7 +32,9 @@ class AccountPersonalDataRepository(AbstractRepository):
         except self.BASE_CLASS.DoesNotExist:
             return None
 
-    def create(self, data: dict) -> BASE_CLASS:
+    def create(self, data: dict, id_registry: Optional[IdRegistry] = None) -> BASE_CLASS:
+        if id_registry is not None:
+            return super().create(data, id_registry)
         if isinstance(data['account'], uuid.UUID):
             corresponding_paypal_account = (
                 PayPalAccountRepository().get_by_id(f"{data['account']}")
@@ -9,6 +9,7 @@ from paypal.domain.banking.models import (
     Card,
     Transaction,
 )
+from paypal.domain.csv_logic.models import CsvLoadCheckpoint
 
 admin.site.register(PayPalAccount)
 admin.site.register(AccountPersonalData)
@@ -16,3 +17,5 @@ admin.site.register(BillingAddress)
 
 admin.site.register(Card)
 admin.site.register(Transaction)
+
+admin.site.register(CsvLoadCheckpoint)
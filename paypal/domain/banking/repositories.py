@@ -23,6 +23,7 @@ from paypal.domain.core.abstract import AbstractRepository
 from paypal.domain.core.exceptions import (
     ObjectMustBeLinkedError,
 )
+from paypal.domain.core.registry import IdRegistry
 from paypal.domain.core.util import EntityVerbose
 
 
@@ -45,7 +46,9 @@ class BillingAddressRepository(AbstractRepository):
             except BillingAddress.DoesNotExist:
                 return None
 
-    def create(self, data: dict) -> BillingAddress:
+    def create(self, data: dict, id_registry: Optional[IdRegistry] = None) -> BillingAddress:
+        if id_registry is not None:
+            return super().create(data, id_registry)
         if isinstance(data['account_personal_data'], uuid.UUID):
             account_personal_data = AccountPersonalDataRepository().get_by_id(
                 f"{data['account_personal_data']}"
@@ -107,7 +110,9 @@ class CardRepository(AbstractRepository):
             except Card.DoesNotExist:
                 return None
 
-    def create(self, data: dict) -> Card:
+    def create(self, data: dict, id_registry: Optional[IdRegistry] = None) -> Card:
+        if id_registry is not None:
+            return super().create(data, id_registry)
         if isinstance(data['account'], uuid.UUID):
             account = PayPalAccountRepository().get_by_id(
                 f"{data['account']}"
@@ -191,7 +196,9 @@ class TransactionRepository(AbstractRepository):
             except Transaction.DoesNotExist:
                 return None
 
-    def create(self, data: dict) -> Transaction:
+    def create(self, data: dict, id_registry: Optional[IdRegistry] = None) -> Transaction:
+        if id_registry is not None:
+            return super().create(data, id_registry)
         if isinstance(data['from_card'], uuid.UUID):
             from_card = CardRepository().get_by_id(f"{data['from_card']}")
             if not from_card:
@@ -203,7 +210,7 @@ class TransactionRepository(AbstractRepository):
         if isinstance(data['to_card'], uuid.UUID):
             to_card = CardRepository().get_by_id(f"{data['to_card']}")
             if not to_card:
-                ObjectMustBeLinkedError(
+                raise ObjectMustBeLinkedError(
                     type=self.BASE_CLASS._meta.verbose_name,
                     link_to=['to_card'],
                 )
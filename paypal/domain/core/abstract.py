@@ -1,9 +1,33 @@
+import hashlib
+import uuid
 from abc import ABC
-from typing import Optional
+from typing import (
+    Callable,
+    Iterable,
+    Optional,
+)
 
-from django.db.models import QuerySet
-from django.db.utils import IntegrityError
+from django.core.exceptions import ValidationError
+from django.db import (
+    DataError,
+    IntegrityError,
+    connection,
+    transaction,
+)
+from django.db.backends.utils import format_number
+from django.db.models import (
+    DecimalField,
+    Model,
+    QuerySet,
+)
+from paypal.domain.core.exceptions import (
+    LoaderEngineNotSupportedError,
+    ObjectMustBeLinkedError,
+    UniqueValueTakenError,
+)
 from paypal.domain.core.models import BaseUUIDModel
+from paypal.domain.core.registry import IdRegistry
+from paypal.domain.core.util import chunked
 
 
 class AbstractRepository(ABC):
@@ -11,6 +35,17 @@ class AbstractRepository(ABC):
     Base repository class implementation.
     """
     BASE_CLASS = BaseUUIDModel
+    # Errors caused by the rows themselves. Others, such as a lost connection, are not
+    # rejected row by row but abort the load.
+    REJECTABLE_ERRORS = (DataError, IntegrityError, TypeError, ValidationError, ValueError)
+
+    def __init__(self, base_class: Optional[type[Model]] = None):
+        """
+        Work on *base_class* instead of BASE_CLASS if given, e.g. on a staging copy of its table.
+        """
+        if base_class is not None:
+            self.BASE_CLASS = base_class
+        super().__init__()
 
     def get_all(self) -> QuerySet[BASE_CLASS]:
         return self.BASE_CLASS.objects.all()
@@ -21,11 +56,244 @@ class AbstractRepository(ABC):
         except self.BASE_CLASS.DoesNotExist:
             return None
 
-    def create(self, data: dict) -> BASE_CLASS:
-        obj = self.BASE_CLASS(**data)
+    def create(self, data: dict, id_registry: Optional[IdRegistry] = None) -> BASE_CLASS:
+        obj = self.build(data, id_registry) if id_registry is not None else self.BASE_CLASS(**data)
         self.save(obj)
+        if id_registry is not None:
+            id_registry.add(self.BASE_CLASS, [obj.pk])
         return obj
 
+    def build(self, data: dict, id_registry: Optional[IdRegistry] = None) -> BASE_CLASS:
+        """
+        Build an unsaved object, assigning raw UUID foreign keys through their *_id attributes.
+        If *id_registry* is given, ids it does not know raise ObjectMustBeLinkedError
+        (or are dropped for nullable foreign keys).
+        """
+        for field in self.BASE_CLASS._meta.concrete_fields:
+            if field.is_relation and isinstance(data.get(field.name), uuid.UUID):
+                related_id = data.pop(field.name)
+                if (
+                        id_registry is not None
+                        and not id_registry.contains(field.related_model, related_id)
+                ):
+                    if not field.null:
+                        raise ObjectMustBeLinkedError(
+                            type=self.BASE_CLASS._meta.verbose_name,
+                            link_to=[f'{field.name} ({field.related_model._meta.verbose_name})'],
+                        )
+                    related_id = None
+                data[field.attname] = related_id
+        return self.BASE_CLASS(**data)
+
+    @classmethod
+    def get_reject_reason(cls, error: Exception) -> str:
+        """
+        Return a one-line description of why a row could not be written.
+        """
+        if isinstance(error, ValidationError):
+            return '; '.join(error.messages)
+        return (str(error).strip().splitlines() or [type(error).__name__])[0]
+
+    def _bulk_create_or_bisect(
+            self, rows: list, id_registry: Optional[IdRegistry],
+            on_reject: Callable[[dict, str], None]
+    ) -> int:
+        """
+        Create a batch inside a savepoint. If it fails, retry both halves of it the same way
+        until the failing rows are isolated; those are passed to *on_reject* and skipped.
+        Return the number of created objects.
+        """
+        try:
+            with transaction.atomic():
+                objs = [self.build(dict(data), id_registry) for data in rows]
+                self.BASE_CLASS.objects.bulk_create(objs)
+        except AbstractRepository.REJECTABLE_ERRORS as e:
+            if len(rows) == 1:
+                on_reject(rows[0], AbstractRepository.get_reject_reason(e))
+                return 0
+            middle = len(rows) // 2
+            return (
+                self._bulk_create_or_bisect(rows[:middle], id_registry, on_reject)
+                + self._bulk_create_or_bisect(rows[middle:], id_registry, on_reject)
+            )
+        if id_registry is not None:
+            id_registry.add(self.BASE_CLASS, [obj.pk for obj in objs])
+        return len(objs)
+
+    def bulk_create(
+            self, rows: Iterable[dict], batch_size: int, id_registry: Optional[IdRegistry] = None,
+            on_reject: Optional[Callable[[dict, str], None]] = None
+    ) -> int:
+        """
+        Create objects with multi-row INSERTs of *batch_size* rows inside one transaction.
+        Return the number of created objects.
+        If *on_reject* is given, rows that cannot be written are isolated by bisecting
+        their batch and passed to on_reject(row, reason) instead of aborting the load.
+        """
+        created = 0
+        with transaction.atomic():
+            for batch in chunked(rows, batch_size):
+                if on_reject:
+                    created += self._bulk_create_or_bisect(batch, id_registry, on_reject)
+                    continue
+                objs = [self.build(data, id_registry) for data in batch]
+                self.BASE_CLASS.objects.bulk_create(objs, batch_size=batch_size)
+                if id_registry is not None:
+                    id_registry.add(self.BASE_CLASS, [obj.pk for obj in objs])
+                created += len(objs)
+        return created
+
+    @classmethod
+    def _get_content_hash(cls, fields: list, values: Iterable) -> bytes:
+        """
+        Hash the values of a row the way they are stored, so that a parsed row and the same
+        row read back from the database hash alike (e.g. 1.5 and 1.50 in a DecimalField).
+        """
+        content = '\x1f'.join(
+            format_number(field.to_python(value), field.max_digits, field.decimal_places)
+            if isinstance(field, DecimalField) and value is not None
+            else str(field.get_db_prep_save(value, connection))
+            for field, value in zip(fields, values)
+        )
+        return hashlib.blake2b(content.encode(), digest_size=16).digest()
+
+    def _get_stored_hashes(self, pks: list, fields: list) -> dict:
+        """
+        Return the content hashes of the rows with the given primary keys, by primary key.
+        """
+        stored_rows = self.BASE_CLASS.objects.filter(pk__in=pks).values_list(
+            self.BASE_CLASS._meta.pk.attname, *(field.attname for field in fields)
+        )
+        return {
+            pk: AbstractRepository._get_content_hash(fields, values)
+            for pk, *values in stored_rows
+        }
+
+    def _get_unique_value_errors(self, objs: list, fields: list) -> dict:
+        """
+        Return a UniqueValueTakenError by index of every object whose value of a unique
+        field is stored under another primary key (even one that is updated in the same
+        batch, as rows are checked one by one), or taken by an earlier object of *objs*.
+        ON CONFLICT only targets the primary key, so such an object would fail the whole
+        statement.
+        """
+        errors = {}
+        pk_attname = self.BASE_CLASS._meta.pk.attname
+        for field in fields:
+            if not field.unique:
+                continue
+            owners = {}
+            for obj in objs:
+                value = getattr(obj, field.attname)
+                if value is not None:
+                    owners.setdefault(value, obj.pk)
+            owners.update(
+                self.BASE_CLASS.objects.filter(**{f'{field.attname}__in': list(owners)})
+                .values_list(field.attname, pk_attname)
+            )
+            for index, obj in enumerate(objs):
+                value = getattr(obj, field.attname)
+                if value is not None and owners[value] != obj.pk and index not in errors:
+                    errors[index] = UniqueValueTakenError(
+                        self.BASE_CLASS._meta.verbose_name, field.name, value, owners[value]
+                    )
+        return errors
+
+    def _insert_or_update(self, objs: list, fields: list) -> None:
+        """
+        Write objects with one INSERT ... ON CONFLICT (pk) DO UPDATE statement.
+        The creation time of existing rows is kept.
+        """
+        quote_name = connection.ops.quote_name
+        pk = self.BASE_CLASS._meta.pk
+        timestamp_fields = [
+            field for field in self.BASE_CLASS._meta.concrete_fields
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        ]
+        columns = [pk] + fields + timestamp_fields
+        updated_columns = fields + [
+            field for field in timestamp_fields if getattr(field, 'auto_now', False)
+        ]
+        row_sql = f"({', '.join(['%s'] * len(columns))})"
+        sql = (
+            f"INSERT INTO {quote_name(self.BASE_CLASS._meta.db_table)} "
+            f"({', '.join(quote_name(field.column) for field in columns)}) "
+            f"VALUES {', '.join([row_sql] * len(objs))} "
+            f"ON CONFLICT ({quote_name(pk.column)}) DO UPDATE SET "
+            + ', '.join(
+                f"{quote_name(field.column)} = EXCLUDED.{quote_name(field.column)}"
+                for field in updated_columns
+            )
+        )
+        params = [
+            field.get_db_prep_save(field.pre_save(obj, add=True), connection)
+            for obj in objs
+            for field in columns
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def upsert(
+            self, rows: Iterable[dict], batch_size: int, id_registry: Optional[IdRegistry] = None,
+            on_reject: Optional[Callable[[dict, str], None]] = None
+    ) -> dict:
+        """
+        Insert new rows and update changed ones in batches of *batch_size* rows inside one
+        transaction. Rows are compared with the stored ones by a hash of their contents;
+        unchanged rows are not written. Return the number of inserted, updated and
+        skipped rows.
+        A row whose unique field value (e.g. an email) is stored under another primary key
+        raises UniqueValueTakenError, or is passed to on_reject(row, reason) and skipped if
+        *on_reject* is given.
+        """
+        if connection.vendor not in ['postgresql', 'sqlite']:
+            raise LoaderEngineNotSupportedError(engine='incremental', vendor=connection.vendor)
+
+        summary = {"inserted": 0, "updated": 0, "skipped": 0}
+        pk = self.BASE_CLASS._meta.pk
+        with transaction.atomic():
+            for batch in chunked(rows, batch_size):
+                fields = [
+                    field for field in map(self.BASE_CLASS._meta.get_field, batch[0])
+                    if field != pk
+                ]
+                objs = [self.build(dict(data), id_registry) for data in batch]
+                unique_value_errors = self._get_unique_value_errors(objs, fields)
+                if unique_value_errors and not on_reject:
+                    raise next(iter(unique_value_errors.values()))
+                stored_hashes = self._get_stored_hashes([obj.pk for obj in objs], fields)
+                changed = []
+                for index, obj in enumerate(objs):
+                    if index in unique_value_errors:
+                        on_reject(
+                            batch[index],
+                            AbstractRepository.get_reject_reason(unique_value_errors[index])
+                        )
+                        continue
+                    stored_hash = stored_hashes.get(obj.pk)
+                    if stored_hash is None:
+                        summary["inserted"] += 1
+                    elif stored_hash != AbstractRepository._get_content_hash(
+                            fields, (getattr(obj, field.attname) for field in fields)
+                    ):
+                        summary["updated"] += 1
+                    else:
+                        summary["skipped"] += 1
+                        continue
+                    changed.append(obj)
+                for changed_batch in chunked(
+                        changed,
+                        connection.ops.bulk_batch_size(self.BASE_CLASS._meta.concrete_fields, changed)
+                        or 1
+                ):
+                    self._insert_or_update(changed_batch, fields)
+                if id_registry is not None:
+                    id_registry.add(self.BASE_CLASS, [
+                        obj.pk for index, obj in enumerate(objs)
+                        if index not in unique_value_errors
+                    ])
+        return summary
+
     def update(self, obj: BASE_CLASS, data: dict) -> BASE_CLASS:
         for name, value in data.items():
             setattr(obj, name, value)
@@ -48,3 +316,18 @@ class AbstractRepository(ABC):
 
     def delete_all(self) -> None:
         self.get_all().delete()
+
+    @classmethod
+    def truncate(cls, repositories: Iterable[type["AbstractRepository"]]) -> bool:
+        """
+        Empty the tables of *repositories* with a single TRUNCATE ... RESTART IDENTITY CASCADE.
+        Return False and leave the tables untouched if the database cannot do that.
+        """
+        if connection.vendor != 'postgresql':
+            return False
+        tables = ', '.join(
+            connection.ops.quote_name(repo.BASE_CLASS._meta.db_table) for repo in repositories
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {tables} RESTART IDENTITY CASCADE')
+        return True
@@ -0,0 +1,154 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Iterable
+
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import Model
+
+from paypal.domain.core.exceptions import (
+    IndexRebuildError,
+    LoaderEngineNotSupportedError,
+)
+from paypal.domain.core.parallel_writer import ParallelWriter
+
+
+class DeferredIndexes:
+    """
+    Drop the secondary indexes, unique constraints and foreign keys of *models* for the time
+    of a bulk load, then rebuild them over *workers* connections and ANALYZE the tables.
+    Which objects to drop and how to rebuild them comes from the model fields through
+    Django's schema editor; only objects that exist in the database are touched.
+    Primary keys are kept. Before anything is dropped, the statements that recreate it are
+    written to *sql_filename*, which is removed once the rebuild succeeds, so they survive
+    a crash of the load.
+    """
+
+    ENGINE = "defer_indexes"
+    FK_SUFFIX = "_fk_%(to_table)s_%(to_column)s"
+
+    def __init__(
+            self, models: Iterable[type[Model]], workers: int = 1, sql_filename: str = None
+    ):
+        self.models = list(models)
+        self.workers = workers
+        self.sql_filename = sql_filename or os.path.join(
+            tempfile.gettempdir(), f'deferred_indexes_{os.getpid()}_{id(self)}.sql'
+        )
+        self.indexes = []
+        self.foreign_keys = []
+        self.failures = []
+        self._failures_lock = threading.Lock()
+        super().__init__()
+
+    def _collect_field(self, editor, model: type[Model], field) -> None:
+        """
+        Collect (drop, create) statements of the indexes and constraints of one field.
+        """
+        if field.is_relation and field.db_constraint:
+            for name in editor._constraint_names(model, [field.column], foreign_key=True):
+                self.foreign_keys.append((
+                    editor._delete_fk_sql(model, name),
+                    editor._create_fk_sql(model, field, DeferredIndexes.FK_SUFFIX),
+                ))
+        if field.unique and not field.primary_key:
+            for name in editor._constraint_names(
+                    model, [field.column], unique=True, primary_key=False, index=False
+            ):
+                self.indexes.append((
+                    editor._delete_unique_sql(model, name),
+                    editor._create_unique_sql(model, [field], name=name),
+                ))
+        for name in editor._constraint_names(
+                model, [field.column], unique=False, primary_key=False, index=True
+        ):
+            self.indexes.append((
+                editor._delete_index_sql(model, name),
+                editor._create_like_index_sql(model, field) if name.endswith("_like")
+                else editor._create_index_sql(model, fields=[field], name=name),
+            ))
+
+    def _collect(self) -> None:
+        with connection.schema_editor(collect_sql=True) as editor:
+            for model in self.models:
+                for field in model._meta.local_concrete_fields:
+                    self._collect_field(editor, model, field)
+                existing_indexes = editor._constraint_names(model, index=True)
+                for index in model._meta.indexes:
+                    if index.name in existing_indexes:
+                        self.indexes.append((
+                            index.remove_sql(model, editor), index.create_sql(model, editor)
+                        ))
+
+    @classmethod
+    def _execute(cls, sql: str) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+
+    def _execute_create(self, sql: str) -> None:
+        """
+        Execute a CREATE statement, recording a failure instead of raising it, so one
+        object that cannot be rebuilt (e.g. a unique constraint over duplicates loaded
+        while it was dropped) does not leave the others unbuilt.
+        """
+        try:
+            DeferredIndexes._execute(sql)
+        except Exception as e:
+            with self._failures_lock:
+                self.failures.append(f"{sql} ({type(e).__name__}: {' '.join(str(e).split())})")
+
+    def _write_sql(self) -> None:
+        with open(self.sql_filename, 'w') as sql_file:
+            for _, create_sql in self.indexes + self.foreign_keys:
+                sql_file.write(f'{create_sql};\n')
+        print(f'Statements to rebuild the dropped objects are written to {self.sql_filename}.')
+
+    def drop(self) -> None:
+        """
+        Write the statements that recreate the foreign keys and indexes to *sql_filename*,
+        then drop the foreign keys first, then the indexes, in one transaction.
+        """
+        if connection.vendor != 'postgresql':
+            raise LoaderEngineNotSupportedError(DeferredIndexes.ENGINE, connection.vendor)
+        self._collect()
+        self._write_sql()
+        with transaction.atomic():
+            for drop_sql, _ in self.foreign_keys + self.indexes:
+                DeferredIndexes._execute(str(drop_sql))
+        print(f'Dropped {len(self.indexes)} indexes and {len(self.foreign_keys)} foreign keys.')
+
+    def rebuild(self) -> float:
+        """
+        Rebuild the indexes, then the foreign keys (each validated with one scan of its
+        table), then ANALYZE the tables, every step spread over the writer connections.
+        Every statement is run even if some fail; the failures are raised together at the
+        end as an IndexRebuildError, and *sql_filename* is kept to rebuild them by hand.
+        Return the elapsed time in seconds.
+        """
+        started = time.perf_counter()
+        self.failures = []
+        with ParallelWriter(self.workers) as writer:
+            for level, statements in enumerate([self.indexes, self.foreign_keys]):
+                for _, create_sql in statements:
+                    writer.submit(level, self._execute_create, str(create_sql))
+            for model in self.models:
+                writer.submit(
+                    2, DeferredIndexes._execute,
+                    f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}'
+                )
+        elapsed = time.perf_counter() - started
+        print(
+            f'Rebuilt {len(self.indexes)} indexes and {len(self.foreign_keys)} foreign keys '
+            f'and analyzed {len(self.models)} tables in {elapsed:.2f}s.'
+        )
+        if self.failures:
+            for failure in self.failures:
+                print(f'Could not rebuild: {failure}')
+            raise IndexRebuildError(self.failures, self.sql_filename)
+        if os.path.exists(self.sql_filename):
+            os.remove(self.sql_filename)
+        return elapsed
@@ -17,3 +17,36 @@ class ObjectMustBeLinkedError(ValidationError):
     def __init__(self, type: str, link_to: list, code=None, params=None):
         message = f"{type} object must be linked to: {', '.join(link_to)}."
         super().__init__(message=message, code=code, params=params)
+
+
+class UniqueValueTakenError(ValidationError):
+    def __init__(self, type: str, field: str, value, id: str, code=None, params=None):
+        message = f"{type} object with {field}={value} already exists with id={id}."
+        super().__init__(message=message, code=code, params=params)
+
+
+class LoaderEngineNotSupportedError(ValidationError):
+    def __init__(self, engine: str, vendor: str, code=None, params=None):
+        message = f"{engine} loader engine is not supported by the {vendor} database backend."
+        super().__init__(message=message, code=code, params=params)
+
+
+class InvalidRowsError(ValidationError):
+    def __init__(self, type: str, count: int, errors: list, code=None, params=None):
+        message = f"{count} {type} rows failed validation: {', '.join(errors)}."
+        super().__init__(message=message, code=code, params=params)
+
+
+class LoadCancelledError(Exception):
+    def __init__(self, job_id: str = None):
+        self.message = f"Load job {job_id} was cancelled." if job_id else "Load was cancelled."
+        super().__init__(self.message)
+
+
+class IndexRebuildError(Exception):
+    def __init__(self, failures: list, sql_filename: str):
+        self.message = (
+            f"{len(failures)} indexes or foreign keys could not be rebuilt: "
+            f"{'; '.join(failures)}. Their CREATE statements are kept in {sql_filename}."
+        )
+        super().__init__(self.message)
@@ -0,0 +1,80 @@
+import queue
+import threading
+from typing import Callable
+
+from django.db import connections
+
+
+class ParallelWriter:
+    """
+    Run write tasks on *workers* threads, each with its own database connection.
+    Tasks are tagged with a dependency level: a task of a new level is only started once
+    every task of the previous level is finished, so rows never reach the database before
+    the rows they reference.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.level = None
+        self._queue = queue.Queue(maxsize=workers * 2)
+        self._error = None
+        self._stopped = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"db-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        super().__init__()
+
+    def _work(self) -> None:
+        try:
+            while (task := self._queue.get()) is not None:
+                func, args = task
+                try:
+                    if not self._stopped.is_set():
+                        func(*args)
+                except BaseException as e:
+                    self._error = self._error or e
+                    self._stopped.set()
+                finally:
+                    self._queue.task_done()
+            self._queue.task_done()
+        finally:
+            connections.close_all()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, level: int, func: Callable, *args) -> None:
+        """
+        Queue func(*args), waiting for the previous level to finish first if *level* is new.
+        Blocks while the queue is full. Raises the first error of any finished task.
+        """
+        if self.level is not None and level != self.level:
+            self.wait()
+        self.level = level
+        self._raise_error()
+        self._queue.put((func, args))
+
+    def wait(self) -> None:
+        """
+        Wait until every queued task is finished.
+        """
+        self._queue.join()
+        self._raise_error()
+
+    def __enter__(self) -> "ParallelWriter":
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            self._stopped.set()
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join()
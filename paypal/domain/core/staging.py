@@ -0,0 +1,156 @@
+import time
+from typing import Iterable
+
+from django.apps.registry import Apps
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import Model
+
+from paypal.domain.core.deferred_indexes import DeferredIndexes
+from paypal.domain.core.exceptions import LoaderEngineNotSupportedError
+
+
+class StagingTables:
+    """
+    Shadow copies of the tables of *models* to load a dataset into while the live tables
+    keep serving reads. Once loaded, the staging tables get their indexes and foreign keys
+    and replace the live tables in one short transaction.
+    Staging models are built from the live model fields in an isolated app registry.
+    *models* must be given parents first.
+    """
+
+    ENGINE = "staging"
+    SUFFIX = "_staging"
+
+    def __init__(self, models: Iterable[type[Model]], workers: int = 1):
+        self.models = StagingTables._build_models(list(models))
+        self.deferred_indexes = DeferredIndexes(self.models.values(), workers)
+        super().__init__()
+
+    @classmethod
+    def _build_models(cls, live_models: list) -> dict:
+        """
+        Return a staging model per live model, with the same fields (in the same column
+        order) stored in a <table>_staging table. Foreign keys point at the staging tables of their targets.
+        """
+        apps = Apps()
+        staging_models = {}
+        with connection.cursor() as cursor:
+            column_positions = {
+                model: [
+                    column.name for column in connection.introspection.get_table_description(
+                        cursor, model._meta.db_table
+                    )
+                ]
+                for model in live_models
+            }
+        for model in live_models:
+            attrs = {
+                "__module__": model.__module__,
+                "Meta": type("Meta", (), {
+                    "apps": apps,
+                    "app_label": model._meta.app_label,
+                    "db_table": f"{model._meta.db_table}{StagingTables.SUFFIX}",
+                    "verbose_name": model._meta.verbose_name,
+                }),
+            }
+            # Fields are created in the column order of the live table, which keeps the
+            # column order of the staging table the same.
+            for field in sorted(
+                    model._meta.local_fields,
+                    key=lambda field: column_positions[model].index(field.column)
+            ):
+                _, _, args, kwargs = field.deconstruct()
+                if field.is_relation:
+                    kwargs.update(to=staging_models[field.related_model], related_name="+")
+                attrs[field.name] = field.__class__(*args, **kwargs)
+            staging_models[model] = type(f"{model.__name__}Staging", (Model,), attrs)
+        return staging_models
+
+    @classmethod
+    def _get_constraint_key(cls, name: str, constraint: dict) -> tuple:
+        """
+        Identify an index or constraint of a table by what it does rather than by its name.
+        """
+        return (
+            tuple(constraint["columns"]), constraint["primary_key"], constraint["unique"],
+            bool(constraint["foreign_key"]), constraint["check"], constraint["index"],
+            name.endswith("_like"),
+        )
+
+    @classmethod
+    def _get_constraint_names(cls, cursor, table: str) -> dict:
+        return {
+            StagingTables._get_constraint_key(name, constraint): name
+            for name, constraint in connection.introspection.get_constraints(cursor, table).items()
+        }
+
+    def _drop_tables(self) -> None:
+        tables = ', '.join(
+            connection.ops.quote_name(model._meta.db_table) for model in self.models.values()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {tables} CASCADE')
+
+    def create(self) -> None:
+        """
+        Create empty staging tables (dropping leftovers of an earlier load) without
+        secondary indexes and foreign keys.
+        """
+        if connection.vendor != 'postgresql':
+            raise LoaderEngineNotSupportedError(StagingTables.ENGINE, connection.vendor)
+        self._drop_tables()
+        with connection.schema_editor() as editor:
+            for model in self.models.values():
+                editor.create_model(model)
+        self.deferred_indexes.drop()
+        print(f'Created {len(self.models)} staging tables.')
+
+    def discard(self) -> None:
+        self._drop_tables()
+        print('Dropped the staging tables.')
+
+    def swap(self) -> float:
+        """
+        Build the indexes and foreign keys of the staging tables, then drop the live tables
+        and rename the staging tables (and their indexes and constraints) into their place
+        in one transaction. Return the time the swap transaction took in seconds.
+        """
+        self.deferred_indexes.rebuild()
+        quote_name = connection.ops.quote_name
+        started = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            live_names = {
+                model: StagingTables._get_constraint_names(cursor, model._meta.db_table)
+                for model in self.models
+            }
+            cursor.execute(
+                f"DROP TABLE {', '.join(quote_name(model._meta.db_table) for model in self.models)}"
+            )
+            for model, staging_model in self.models.items():
+                table = model._meta.db_table
+                cursor.execute(
+                    f'ALTER TABLE {quote_name(staging_model._meta.db_table)} '
+                    f'RENAME TO {quote_name(table)}'
+                )
+                staging_names = connection.introspection.get_constraints(cursor, table)
+                for name, constraint in staging_names.items():
+                    live_name = live_names[model].get(
+                        StagingTables._get_constraint_key(name, constraint)
+                    )
+                    if not live_name or live_name == name:
+                        continue
+                    if constraint["index"]:
+                        cursor.execute(
+                            f'ALTER INDEX {quote_name(name)} RENAME TO {quote_name(live_name)}'
+                        )
+                    else:
+                        cursor.execute(
+                            f'ALTER TABLE {quote_name(table)} '
+                            f'RENAME CONSTRAINT {quote_name(name)} TO {quote_name(live_name)}'
+                        )
+        elapsed = time.perf_counter() - started
+        print(f'Swapped {len(self.models)} staging tables into place in {elapsed:.3f}s.')
+        return elapsed
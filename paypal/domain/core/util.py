@@ -1,3 +1,11 @@
+import uuid
+from itertools import islice
+from typing import (
+    Iterable,
+    Iterator,
+)
+
+
 class EntityVerbose:
     """ Entity verbose names. """
 
@@ -32,3 +40,30 @@ class EntityVerbose:
             EntityVerbose.ACCOUNT_PERSONAL_DATA,
             EntityVerbose.PAYPAL_ACCOUNT
         ]
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    Split an iterable into lists of at most *size* items.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# The slot setters of uuid.UUID skip its read-only __setattr__ like object.__setattr__ does,
+# only faster; the enum member is looked up once, as the lookup costs more than the rest.
+_set_uuid_int = uuid.UUID.__dict__['int'].__set__
+_set_uuid_is_safe = uuid.UUID.__dict__['is_safe'].__set__
+_UNKNOWN_SAFETY = uuid.SafeUUID.unknown
+
+
+def uuid_from_int(value: int) -> uuid.UUID:
+    """
+    Return uuid.UUID(int=value) for a *value* known to be a 128-bit integer, without the
+    argument checks of UUID.__init__: the state is set the way UUID.__setstate__ does.
+    """
+    instance = object.__new__(uuid.UUID)
+    _set_uuid_int(instance, value)
+    _set_uuid_is_safe(instance, _UNKNOWN_SAFETY)
+    return instance
@@ -1,3 +1,9 @@
 """ CSV related logic: generate CSV, read CSV. """
 from .csv_reader import CsvReader
 from .csv_generator import CsvGenerator
+from .csv_copy_loader import CsvCopyLoader
+from .progress import CsvLoadProgress
+from .pipeline import BatchPipeline
+from .reject_writer import CsvRejectWriter
+from .batch_validator import BatchValidator
+from .snapshot import CsvSnapshot
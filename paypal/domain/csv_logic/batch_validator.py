@@ -0,0 +1,206 @@
+import datetime
+import decimal
+import operator
+import uuid
+from typing import (
+    Callable,
+    Optional,
+)
+
+from django.core.exceptions import ValidationError
+from django.core.validators import (
+    MaxLengthValidator,
+    MaxValueValidator,
+    MinLengthValidator,
+    MinValueValidator,
+    RegexValidator,
+)
+from django.db.models import (
+    Field,
+    Model,
+)
+
+
+class BatchValidator:
+    """
+    Validate whole batches of rows of *model* before they are written, one column at a time.
+    Every column is checked against its field: null and blank values, values of the wrong
+    type, the field validators (regexes compiled once, range and length checks compared
+    column-wise) and, for the primary key and unique fields, duplicates within the batch
+    found with a hash set per column. Sets are not kept between batches, so memory stays
+    bounded by the batch size; duplicates across batches are left to the unique
+    constraints of the database.
+    The result is an error mask per failed check: a bytearray with 1 for every failing row.
+    """
+
+    PYTHON_TYPES = {
+        "UUIDField": uuid.UUID,
+        "DecimalField": decimal.Decimal,
+        "DateField": datetime.date,
+        "DateTimeField": datetime.datetime,
+        "BooleanField": bool,
+        "IntegerField": int,
+    }
+    LIMIT_OPERATORS = {
+        MinValueValidator: (operator.lt, None),
+        MaxValueValidator: (operator.gt, None),
+        MinLengthValidator: (operator.lt, len),
+        MaxLengthValidator: (operator.gt, len),
+    }
+
+    def __init__(self, model: type[Model]):
+        self.model = model
+        self._fields = {}
+        self._checks = {}
+        self._unique = set()
+        super().__init__()
+
+    def _get_field(self, name: str) -> Field:
+        if name not in self._fields:
+            field = self.model._meta.get_field(name)
+            self._fields[name] = field
+            self._checks[name] = [
+                (
+                    BatchValidator._get_check_name(validator),
+                    BatchValidator._get_predicate(validator),
+                )
+                for validator in field.validators
+            ]
+            if field.primary_key or field.unique:
+                self._unique.add(name)
+        return self._fields[name]
+
+    @classmethod
+    def _get_python_type(cls, field: Field) -> Optional[type]:
+        while field.is_relation:
+            field = field.target_field
+        return BatchValidator.PYTHON_TYPES.get(field.get_internal_type())
+
+    @classmethod
+    def _coerce(cls, field: Field, values: list) -> tuple:
+        """
+        Convert the values of a typed column that are not of the field's Python type yet
+        (raw strings, floats). Return the converted values, with None for the ones that
+        cannot be converted, and the mask of those.
+        """
+        python_type = BatchValidator._get_python_type(field)
+        if python_type is None:
+            return values, None
+        invalid = bytearray(len(values))
+        coerced = list(values)
+        for i, value in enumerate(values):
+            if value is None or isinstance(value, python_type):
+                continue
+            try:
+                # Floats go through their shortest repr, as they would be written to a CSV file.
+                coerced[i] = field.to_python(str(value) if isinstance(value, float) else value)
+            except ValidationError:
+                coerced[i] = None
+                invalid[i] = 1
+        return coerced, invalid if any(invalid) else None
+
+    @classmethod
+    def _get_predicate(cls, validator: Callable) -> Callable:
+        """
+        Return a function telling whether a non-empty value fails *validator*.
+        Regexes and limits are checked directly, any other validator is called.
+        """
+        if isinstance(validator, RegexValidator):
+            search = validator.regex.search
+            if validator.inverse_match:
+                return lambda value: search(str(value)) is not None
+            return lambda value: search(str(value)) is None
+        if type(validator) in BatchValidator.LIMIT_OPERATORS and not callable(
+                validator.limit_value
+        ):
+            compare, clean = BatchValidator.LIMIT_OPERATORS[type(validator)]
+            limit = validator.limit_value
+            if clean:
+                return lambda value: compare(clean(value), limit)
+            return lambda value: compare(value, limit)
+
+        def fails(value) -> bool:
+            try:
+                validator(value)
+            except ValidationError:
+                return True
+            return False
+        return fails
+
+    @classmethod
+    def _get_check_name(cls, validator: Callable) -> str:
+        if isinstance(validator, RegexValidator):
+            return str(validator.message)
+        name = getattr(validator, "code", None) or type(validator).__name__
+        limit = getattr(validator, "limit_value", None)
+        return f'{name} {limit}' if limit is not None else name
+
+    @classmethod
+    def _check_duplicates(cls, values: list) -> Optional[bytearray]:
+        """
+        Mark values already seen earlier in the batch.
+        """
+        seen = set()
+        mask = bytearray(len(values))
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            if value in seen:
+                mask[i] = 1
+            else:
+                seen.add(value)
+        return mask if any(mask) else None
+
+    def validate(self, rows: list) -> dict:
+        """
+        Check a batch of row dicts. Return {column: [(check, mask)]} for the columns with
+        at least one failing row.
+        """
+        errors = {}
+        if not rows:
+            return errors
+        for name in rows[0]:
+            field = self._get_field(name)
+            values = [row[name] for row in rows]
+            column_errors = []
+            if not field.null:
+                mask = bytearray(value is None for value in values)
+                if any(mask):
+                    column_errors.append(("null", mask))
+            if not field.blank:
+                mask = bytearray(
+                    value is not None and value in field.empty_values for value in values
+                )
+                if any(mask):
+                    column_errors.append(("blank", mask))
+            values, mask = BatchValidator._coerce(field, values)
+            if mask:
+                column_errors.append(("invalid", mask))
+            non_empty = [value not in field.empty_values for value in values]
+            for check, fails in self._checks[name]:
+                mask = bytearray(
+                    checked and fails(value) for checked, value in zip(non_empty, values)
+                )
+                if any(mask):
+                    column_errors.append((check, mask))
+            if name in self._unique:
+                mask = BatchValidator._check_duplicates(values)
+                if mask:
+                    column_errors.append(("duplicate", mask))
+            if column_errors:
+                errors[name] = column_errors
+        return errors
+
+    @classmethod
+    def get_reasons(cls, errors: dict, size: int) -> list:
+        """
+        Turn the error masks of a batch of *size* rows into a reason per row,
+        None for valid rows.
+        """
+        reasons = [None] * size
+        for name, column_errors in errors.items():
+            for check, mask in column_errors:
+                for i in (i for i, failed in enumerate(mask) if failed):
+                    reason = f'{name}: {check}'
+                    reasons[i] = f'{reasons[i]}; {reason}' if reasons[i] else reason
+        return reasons
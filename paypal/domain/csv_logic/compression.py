@@ -0,0 +1,155 @@
+import gzip
+import io
+import struct
+import zlib
+from typing import (
+    BinaryIO,
+    Iterator,
+    Optional,
+)
+
+from paypal.domain.csv_logic.constants import CsvLoaderConstants
+
+
+class BlockGzipWriter(io.BufferedIOBase):
+    """
+    Binary stream that compresses what is written to it into independent gzip members
+    ("blocks") of about BLOCK_SIZE uncompressed bytes, cut after a CRLF line end.
+    The header of every block stores the compressed size of the block in an extra field,
+    so readers can walk the blocks without decompressing them and decompress any of them
+    on its own. The file stays a regular multi-member gzip file.
+    """
+
+    BLOCK_SIZE = 1024 * 1024
+    SUBFIELD_ID = b"PC"
+    # ID1 ID2 CM FLG(FEXTRA) MTIME XFL OS, XLEN, then the subfield: SI1 SI2 LEN SIZE.
+    HEADER = struct.Struct("<BBBBIBBH2sHI")
+    TRAILER = struct.Struct("<II")
+
+    def __init__(self, fileobj: BinaryIO, compresslevel: int = 6):
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self._buffer = bytearray()
+        super().__init__()
+
+    def writable(self) -> bool:
+        return True
+
+    def _write_block(self, data: bytes) -> None:
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+        deflated = compressor.compress(data) + compressor.flush()
+        size = BlockGzipWriter.HEADER.size + len(deflated) + BlockGzipWriter.TRAILER.size
+        self.fileobj.write(BlockGzipWriter.HEADER.pack(
+            0x1f, 0x8b, 8, 4, 0, 0, 255, 8, BlockGzipWriter.SUBFIELD_ID, 4, size
+        ))
+        self.fileobj.write(deflated)
+        self.fileobj.write(BlockGzipWriter.TRAILER.pack(zlib.crc32(data), len(data) & 0xffffffff))
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        if len(self._buffer) >= BlockGzipWriter.BLOCK_SIZE:
+            cut = self._buffer.rfind(b'\r\n') + 2
+            if cut > 1:
+                self._write_block(bytes(self._buffer[:cut]))
+                del self._buffer[:cut]
+        return len(data)
+
+    def end_block(self) -> None:
+        """
+        Write everything buffered as a block, so the next write starts a new one.
+        """
+        if self._buffer:
+            self._write_block(bytes(self._buffer))
+            self._buffer.clear()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.end_block()
+            self.fileobj.close()
+        super().close()
+
+
+class CsvCompression:
+    """
+    Compressed CSV files, chosen by file extension.
+    Written files consist of blocks that start on row boundaries, with every section of the
+    file starting a new block, so sections and chunks of them stay seekable.
+    """
+
+    EXTENSIONS = {
+        CsvLoaderConstants.Compressions.GZIP: ".gz",
+    }
+
+    @classmethod
+    def is_compressed(cls, filename: str) -> bool:
+        return str(filename).endswith(tuple(CsvCompression.EXTENSIONS.values()))
+
+    @classmethod
+    def get_filename(cls, filename: str, compression: str) -> str:
+        """
+        Return *filename* with the extension of *compression* added if it is missing.
+        """
+        extension = CsvCompression.EXTENSIONS.get(compression, "")
+        return filename if str(filename).endswith(extension) else f'{filename}{extension}'
+
+    @classmethod
+    def open(cls, filename: str, mode: str = 'r', newline: Optional[str] = None):
+        """
+        Open a CSV file like open() does, compressing or decompressing it on the fly if its
+        extension says so.
+        """
+        if not CsvCompression.is_compressed(filename):
+            return open(f'{filename}', mode, newline=newline)
+        if 'w' in mode:
+            writer = BlockGzipWriter(open(f'{filename}', 'wb'))
+            return writer if 'b' in mode else io.TextIOWrapper(writer, newline=newline)
+        if 'b' in mode:
+            return gzip.open(f'{filename}', mode)
+        return gzip.open(f'{filename}', 'rt', newline=newline)
+
+    @classmethod
+    def end_block(cls, csvfile) -> None:
+        """
+        Make the next row written to *csvfile* start a new block (no-op for plain files).
+        """
+        csvfile.flush()
+        buffer = getattr(csvfile, "buffer", csvfile)
+        if isinstance(buffer, BlockGzipWriter):
+            buffer.end_block()
+
+    @classmethod
+    def iter_blocks(cls, csvfile: BinaryIO) -> Iterator[tuple]:
+        """
+        Yield the (start, end) offsets of the blocks of a file written by BlockGzipWriter,
+        reading only their headers. Raise ValueError for any other gzip file.
+        """
+        offset = 0
+        while header := csvfile.read(BlockGzipWriter.HEADER.size):
+            fields = BlockGzipWriter.HEADER.unpack(header)
+            if fields[:2] != (0x1f, 0x8b) or fields[8] != BlockGzipWriter.SUBFIELD_ID:
+                raise ValueError(f'{csvfile.name} is not a block-compressed CSV file.')
+            yield offset, offset + fields[10]
+            offset += fields[10]
+            csvfile.seek(offset)
+
+    @classmethod
+    def read_first_line(cls, csvfile: BinaryIO, start: int, max_length: int = 4096) -> bytes:
+        """
+        Decompress just enough of the block at *start* to return its first line.
+        """
+        csvfile.seek(start + BlockGzipWriter.HEADER.size)
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        data = decompressor.decompress(csvfile.read(max_length), max_length)
+        return data.split(b'\n', 1)[0]
+
+    @classmethod
+    def is_seekable(cls, filename: str) -> bool:
+        """
+        Check whether a compressed file can be read block by block.
+        """
+        with open(f'{filename}', 'rb') as csvfile:
+            header = csvfile.read(BlockGzipWriter.HEADER.size)
+        return (
+            len(header) == BlockGzipWriter.HEADER.size
+            and BlockGzipWriter.HEADER.unpack(header)[8] == BlockGzipWriter.SUBFIELD_ID
+        )
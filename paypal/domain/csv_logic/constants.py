@@ -0,0 +1,42 @@
+""" Constants file. """
+from django.db import models
+
+
+class CsvLoaderConstants:
+    """
+    CSV loader constants.
+    """
+
+    DEFAULT_FILENAME = "generated.csv"
+    DEFAULT_ROWS_TO_CREATE = 1000
+    DEFAULT_BATCH_SIZE = 1000
+    JOB_WORKERS = 2
+    FINISHED_JOBS_TO_KEEP = 100
+
+    class Engines(models.TextChoices):
+        ORM = "orm", "ORM"
+        BULK = "bulk", "Bulk"
+        COPY = "copy", "Copy"
+
+    class FlushEngines(models.TextChoices):
+        TRUNCATE = "truncate", "Truncate"
+        DELETE = "delete", "Delete"
+
+    class Compressions(models.TextChoices):
+        NONE = "none", "None"
+        GZIP = "gzip", "Gzip"
+
+    class Sources(models.TextChoices):
+        FILE = "file", "File"
+        GENERATOR = "generator", "Generator"
+
+    class JobPhases(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        FLUSHING = "flushing", "Flushing"
+        GENERATING = "generating", "Generating"
+        PARSING = "parsing", "Parsing"
+        LOADING = "loading", "Loading"
+        INDEXING = "indexing", "Indexing"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+        CANCELLED = "cancelled", "Cancelled"
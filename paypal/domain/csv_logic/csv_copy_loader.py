@@ -0,0 +1,134 @@
+import datetime
+from typing import (
+    Iterator,
+    Optional,
+    TextIO,
+)
+
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models import Model
+
+from paypal.domain.core.exceptions import LoaderEngineNotSupportedError
+from paypal.domain.csv_logic.compression import CsvCompression
+from paypal.domain.csv_logic.csv_reader import CsvConverterHandler
+from paypal.domain.csv_logic.progress import CsvLoadProgress
+from paypal.domain.csv_logic.util import CsvHeaders
+
+
+class CsvCopySectionStream:
+    """
+    File-like object that feeds one CSV section to COPY line by line.
+    Stops at the blank row that separates sections or at the end of the file.
+    """
+
+    def __init__(
+            self, csvfile: TextIO, suffix: str = '', progress: Optional[CsvLoadProgress] = None
+    ):
+        self.csvfile = csvfile
+        self.suffix = suffix
+        self.progress = progress
+        self.rows_read = 0
+        self._buffer = []
+        self._buffer_size = 0
+        self._exhausted = False
+
+    def _next_line(self) -> Optional[str]:
+        line = self.csvfile.readline().rstrip('\r\n')
+        if not line or line == '"':
+            self._exhausted = True
+            return None
+        self.rows_read += 1
+        return f'{line}{self.suffix}\n'
+
+    def read(self, size: int = -1) -> str:
+        if self.progress:
+            self.progress.check_cancelled()
+        while not self._exhausted and (size < 0 or self._buffer_size < size):
+            line = self._next_line()
+            if line is not None:
+                self._buffer.append(line)
+                self._buffer_size += len(line)
+        data = ''.join(self._buffer)
+        self._buffer, self._buffer_size = [], 0
+        return data
+
+    def readline(self, size: int = -1) -> str:
+        if self._buffer:
+            self._buffer_size -= len(self._buffer[0])
+            return self._buffer.pop(0)
+        if self._exhausted:
+            return ''
+        return self._next_line() or ''
+
+
+class CsvCopyLoader:
+    """ Load a generated CSV straight into its tables with PostgreSQL COPY. """
+
+    @classmethod
+    def _get_timestamp_columns(cls, model: type[Model]) -> list:
+        """
+        Return auto_now/auto_now_add fields of a model, which COPY does not fill in.
+        """
+        return [
+            field for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        ]
+
+    @classmethod
+    def _build_copy_sql(cls, model: type[Model], header: list) -> str:
+        """
+        Build COPY statement for a section, mapping CSV columns to table columns.
+        """
+        quote_name = connection.ops.quote_name
+        columns = [model._meta.get_field(name).column for name in header]
+        columns += [field.column for field in CsvCopyLoader._get_timestamp_columns(model)]
+        return (
+            f"COPY {quote_name(model._meta.db_table)} "
+            f"({', '.join(quote_name(column) for column in columns)}) "
+            f"FROM STDIN WITH (FORMAT csv, DELIMITER ';', NULL '\\N')"
+        )
+
+    @classmethod
+    def _iter_sections(cls, csvfile: TextIO) -> Iterator[tuple]:
+        """
+        Yield (model, header) for every section header found in the file.
+        The file position is left right after the header row.
+        """
+        headers = CsvHeaders.get_headers()
+        while line := csvfile.readline():
+            row = line.rstrip('\r\n').split(';')
+            if row in headers:
+                yield CsvConverterHandler.map_header_to_model(row), row
+
+    def load(
+            self, filename: str = 'generated.csv', progress: Optional[CsvLoadProgress] = None,
+            models: Optional[dict] = None
+    ) -> dict:
+        """
+        Stream every section of a file written by CsvGenerator.generate_csv into its table
+        with COPY ... FROM STDIN. Return the number of copied rows per entity.
+        *models* maps models to the models whose tables should be written instead.
+        """
+        if connection.vendor != 'postgresql':
+            raise LoaderEngineNotSupportedError(engine='copy', vendor=connection.vendor)
+
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        result = {}
+        with CsvCompression.open(filename, newline='') as csvfile:
+            for model, header in CsvCopyLoader._iter_sections(csvfile):
+                model = (models or {}).get(model, model)
+                timestamp_columns = CsvCopyLoader._get_timestamp_columns(model)
+                stream = CsvCopySectionStream(
+                    csvfile, suffix=f';{now}' * len(timestamp_columns), progress=progress
+                )
+                print(f'Copying entities of class: {model._meta.verbose_name}...')
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.copy_expert(CsvCopyLoader._build_copy_sql(model, header), stream)
+                result[model._meta.verbose_name] = stream.rows_read
+                if progress:
+                    progress.add_rows(model._meta.verbose_name, stream.rows_read)
+                print(f'Copied {stream.rows_read} entities of {model._meta.verbose_name}.')
+        return result
@@ -1,175 +1,330 @@
 import csv
-import datetime
+import os
 import random
-import uuid
-
-from faker import Faker
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import (
+    Iterator,
+    Optional,
+)
 
 from paypal.domain.core.util import EntityVerbose
+from paypal.domain.csv_logic.compression import CsvCompression
+from paypal.domain.csv_logic.id_pool import IdPool
+from paypal.domain.csv_logic.progress import CsvLoadProgress
 from paypal.domain.csv_logic.util import CsvHeaders
+from paypal.domain.csv_logic.value_bank import FakerValueBank
 
 
 class CsvGenerator:
     @classmethod
-    def _generate_paypal_account_data(cls, new_id: uuid.UUID) -> list:
+    def _draw_ids(cls, pool: IdPool, k: int, bank: FakerValueBank) -> list:
         """
-        Generate values for an object of PayPalAccount and return them as a list.
+        Draw *k* foreign keys from an id pool, by index.
         """
-        return [
-            new_id,
-            random.choice(["personal", "business"]),
-            round(random.uniform(0.0, 5000.0), 2),
-        ]
+        return pool.get_ids(bank.indexes(len(pool), k))
 
     @classmethod
-    def _get_unique_account_id(cls, account_ids: list, used_account_ids: set) -> uuid.UUID:
+    def _generate_paypal_account_rows(cls, ids: list, bank: FakerValueBank) -> list:
         """
-        Find id of an account that does not have a linked AccountPersonalData object yet.
+        Generate rows of PayPalAccount objects for the given ids.
         """
-        is_free = False
-        new_id = None
-        while not is_free:
-            new_id = random.choice(account_ids)
-            if new_id not in used_account_ids:
-                is_free = True
-        return new_id
+        k = len(ids)
+        return list(zip(
+            ids,
+            bank.choices(["personal", "business"], k),
+            bank.amounts(5000, k),
+        ))
 
     @classmethod
-    def _generate_account_personal_data(cls, new_id: uuid.UUID) -> list:
+    def _assign_personal_data_accounts(
+            cls, account_ids: IdPool, coverage: float, rng: random.Random
+    ) -> IdPool:
         """
-        Generate values for an object of AccountPersonalData and return them as a list.
+        Pick the accounts that get an AccountPersonalData object, one object per account.
+        The picked accounts are a view of the account pool in a seeded permutation order,
+        so no account is drawn twice and nothing is materialized.
         """
-        return [
-            new_id,
-            Faker().name(),
-            Faker().date_of_birth(),
-            Faker().country(),
-            Faker().msisdn(),
-            "",
-            Faker().password(),
-            Faker().email()
-        ]
+        return account_ids.shuffled(round(len(account_ids) * coverage), rng)
 
     @classmethod
-    def _generate_billing_address_data(cls, new_id: uuid.UUID, account_ids: list) -> list:
+    def _generate_account_personal_data_rows(
+            cls, ids: list, start: int, bank: FakerValueBank
+    ) -> list:
         """
-        Generate values for an object of BillingAddress and return them as a list.
+        Generate rows of AccountPersonalData objects for the given account ids.
+        *start* is the index of the first row in the section, which keeps emails unique.
         """
-        return [
-            new_id,
-            random.choice(account_ids),
-            Faker().street_address(),
-            Faker().sentence(),
-            Faker().city(),
-            Faker().state_abbr(),
-            Faker().zipcode()
-        ]
+        k = len(ids)
+        return list(zip(
+            ids,
+            bank.draw("name", k),
+            bank.draw("date_of_birth", k),
+            bank.draw("country", k),
+            bank.draw("phone_number", k),
+            [""] * k,
+            bank.draw("password", k),
+            bank.emails(start, k),
+        ))
 
     @classmethod
-    def _generate_card_data(
-            cls, new_id: uuid.UUID, account_ids: list, billing_address_ids: list
+    def _generate_billing_address_rows(
+            cls, ids: list, personal_data_ids: IdPool, bank: FakerValueBank
     ) -> list:
         """
-        Generate values for an object of Card and return them as a list.
+        Generate rows of BillingAddress objects for the given ids.
         """
-        return [
-            new_id,
-            random.choice(account_ids),
-            random.choice(billing_address_ids),
-            round(random.uniform(0.0, 50000.0), 2),
-            False,
-            Faker().credit_card_number(),
-            Faker().credit_card_security_code(),
-            Faker().credit_card_expire()
-        ]
+        k = len(ids)
+        return list(zip(
+            ids,
+            CsvGenerator._draw_ids(personal_data_ids, k, bank),
+            bank.draw("street_address", k),
+            bank.draw("sentence", k),
+            bank.draw("city", k),
+            bank.draw("state_abbr", k),
+            bank.draw("zipcode", k),
+        ))
 
     @classmethod
-    def _generate_transaction_data(cls, card_ids: list) -> list:
+    def _generate_card_rows(
+            cls, ids: list, account_ids: IdPool, billing_address_ids: IdPool, bank: FakerValueBank
+    ) -> list:
         """
-        Generate values for an object of Transaction and return them as a list.
+        Generate rows of Card objects for the given ids.
         """
-        return [
-            uuid.uuid4(),
-            random.choice(card_ids),
-            random.choice(card_ids),
-            datetime.datetime.strftime(Faker().date_time_this_year(), "%Y-%m-%d %H:%M:%S"),
-            random.choice(["auto_payment", "payment", "refund", "transfer"]),
-            random.choice(["paypal_balance", "payment", "card", "rewards"]),
-            random.choice(["pending", "completed", "cancelled"])
-        ]
+        k = len(ids)
+        return list(zip(
+            ids,
+            CsvGenerator._draw_ids(account_ids, k, bank),
+            CsvGenerator._draw_ids(billing_address_ids, k, bank),
+            bank.amounts(50000, k),
+            [False] * k,
+            bank.draw("card_number", k),
+            bank.draw("card_security_code", k),
+            bank.draw("card_expire", k),
+        ))
 
     @classmethod
-    def generate_csv(cls, filename: str = 'generated.csv', rows_to_write: int = 1000) -> None:
+    def _generate_transaction_rows(cls, ids: list, card_ids: IdPool, bank: FakerValueBank) -> list:
         """
-        Generate CSV file with fake data.
+        Generate rows of Transaction objects for the given ids.
         """
-        with open(f'{filename}', 'w', newline='\n') as csvfile:
-            writer = csv.writer(csvfile, delimiter=';')
-            print(f'Generating {filename}...')
+        k = len(ids)
+        return list(zip(
+            ids,
+            CsvGenerator._draw_ids(card_ids, k, bank),
+            CsvGenerator._draw_ids(card_ids, k, bank),
+            bank.draw("date_time_this_year", k),
+            bank.choices(["auto_payment", "payment", "refund", "transfer"], k),
+            bank.choices(["paypal_balance", "payment", "card", "rewards"], k),
+            bank.choices(["pending", "completed", "cancelled"], k),
+        ))
 
-            writer.writerow(CsvHeaders.paypal_account_headers)
+    @classmethod
+    def _generate_rows(
+            cls, section: int, start: int, stop: int, pools: dict, bank: FakerValueBank
+    ) -> list:
+        """
+        Generate rows [start, stop) of a section, drawing foreign keys from the id pools.
+        """
+        if section == 0:
+            return CsvGenerator._generate_paypal_account_rows(
+                pools["account_ids"][start:stop], bank
+            )
+        if section == 1:
+            return CsvGenerator._generate_account_personal_data_rows(
+                pools["personal_data_ids"][start:stop], start, bank
+            )
+        if section == 2:
+            return CsvGenerator._generate_billing_address_rows(
+                pools["billing_address_ids"][start:stop], pools["personal_data_ids"], bank
+            )
+        if section == 3:
+            return CsvGenerator._generate_card_rows(
+                pools["card_ids"][start:stop], pools["account_ids"], pools["billing_address_ids"],
+                bank
+            )
+        return CsvGenerator._generate_transaction_rows(
+            pools["transaction_ids"][start:stop], pools["card_ids"], bank
+        )
 
-            account_ids = []
-            used_account_ids = set()
+    @classmethod
+    def _generate_pools(
+            cls, seed: int, rows_per_entity: int, personal_data_coverage: float = 1.0
+    ) -> dict:
+        """
+        Generate the id pools of all sections from *seed*. Pools compute their ids from
+        the index, so they take constant memory whatever *rows_per_entity* is.
+        """
+        pools = {
+            pool_name: IdPool(f'{seed}-{pool_name}', rows_per_entity)
+            for pool_name in ["account_ids", "billing_address_ids", "card_ids", "transaction_ids"]
+        }
+        pools["personal_data_ids"] = CsvGenerator._assign_personal_data_accounts(
+            pools["account_ids"], personal_data_coverage, random.Random(f'{seed}-personal_data')
+        )
+        return pools
 
-            for i in range(0, rows_to_write // 5):
-                new_id = uuid.uuid4()
-                account_ids.append(new_id)
-                writer.writerow(
-                    CsvGenerator._generate_paypal_account_data(new_id)
-                )
+    @classmethod
+    def _get_section_rows(cls, pools: dict) -> list:
+        """
+        Return the number of rows of every section, in section order.
+        """
+        return [
+            len(pools[pool_name])
+            for pool_name in [
+                "account_ids", "personal_data_ids", "billing_address_ids", "card_ids",
+                "transaction_ids"
+            ]
+        ]
 
-            print(f'Generated {EntityVerbose.PAYPAL_ACCOUNT}s...')
+    @classmethod
+    def _generate_csv_in_parallel(
+            cls, filename: str, rows_to_write: int, workers: int, seed: Optional[int] = None,
+            personal_data_coverage: float = 1.0, progress: Optional[CsvLoadProgress] = None
+    ) -> None:
+        """
+        Generate CSV file with fake data, sharding every section across worker processes.
+        Id pools and value pools are generated once from *seed* and shared with the workers,
+        every shard is seeded from (seed, section, shard), and shard files are concatenated
+        in order.
+        """
+        seed = seed if seed is not None else random.getrandbits(32)
+        pools = CsvGenerator._generate_pools(seed, rows_to_write // 5, personal_data_coverage)
+        value_pools = FakerValueBank(
+            seed, FakerValueBank.get_pool_size(rows_to_write // 5)
+        ).get_pools()
+        entity_names = EntityVerbose.get_verbose_names()
+        headers = CsvHeaders.get_headers()
+        print(f'Generating {filename} with {workers} workers (seed={seed})...')
 
-            writer.writerow('\n')
-            writer.writerow(CsvHeaders.account_personal_data_headers)
+        with ProcessPoolExecutor(
+                max_workers=workers, initializer=init_shard_worker,
+                initargs=(pools, value_pools, seed)
+        ) as executor:
+            shards = []
+            section_rows = CsvGenerator._get_section_rows(pools)
+            for section, rows in enumerate(section_rows):
+                shard_size = -(-rows // workers) or 1
+                shards.append([
+                    executor.submit(
+                        generate_shard, f'{filename}.{section}.{start}.part',
+                        section, start, min(start + shard_size, rows),
+                        f'{seed}-{section}-{start}'
+                    )
+                    for start in range(0, rows, shard_size)
+                ])
 
-            for i in range(0, rows_to_write // 5):
-                new_id = CsvGenerator._get_unique_account_id(account_ids, used_account_ids)
-                used_account_ids.add(new_id)
-                writer.writerow(
-                    CsvGenerator._generate_account_personal_data(new_id)
-                )
+            with CsvCompression.open(filename, 'w', newline='\n') as csvfile:
+                writer = csv.writer(csvfile, delimiter=';')
+                for section, header in enumerate(headers):
+                    if section:
+                        writer.writerow('\n')
+                        CsvCompression.end_block(csvfile)
+                    writer.writerow(header)
+                    csvfile.flush()
+                    for future in shards[section]:
+                        shard_filename = future.result()
+                        with open(shard_filename, 'rb') as shard_file:
+                            shutil.copyfileobj(shard_file, csvfile.buffer)
+                        os.remove(shard_filename)
+                    if progress:
+                        progress.add_rows(entity_names[section], section_rows[section])
+                    print(f'Generated {entity_names[section]}...')
 
-            print(f'Generated {EntityVerbose.ACCOUNT_PERSONAL_DATA}...')
+        print(f'Generated a CSV with {rows_to_write} rows.')
 
-            writer.writerow('\n')
-            writer.writerow(CsvHeaders.billing_address_headers)
+    @classmethod
+    def iter_batches(
+            cls, rows_to_write: int = 1000, batch_size: int = 1000, seed: Optional[int] = None,
+            personal_data_coverage: float = 1.0, tee_filename: Optional[str] = None
+    ) -> Iterator[tuple]:
+        """
+        Generate fake data and yield (entity name, header, rows) batches of at most
+        *batch_size* rows, section by section in FK order.
+        If *tee_filename* is given, the rows are written to a CSV file as well.
+        """
+        seed = seed if seed is not None else random.getrandbits(32)
+        bank = FakerValueBank(seed, FakerValueBank.get_pool_size(rows_to_write // 5))
+        pools = CsvGenerator._generate_pools(seed, rows_to_write // 5, personal_data_coverage)
+        entity_names = EntityVerbose.get_verbose_names()
+        headers = CsvHeaders.get_headers()
 
-            billing_address_ids = []
-            for i in range(0, rows_to_write // 5):
-                new_id = uuid.uuid4()
-                billing_address_ids.append(new_id)
-                writer.writerow(
-                    CsvGenerator._generate_billing_address_data(new_id, account_ids)
-                )
+        with (
+                CsvCompression.open(tee_filename, 'w', newline='\n') if tee_filename
+                else nullcontext()
+        ) as csvfile:
+            writer = csv.writer(csvfile, delimiter=';') if csvfile else None
+            for section, rows in enumerate(CsvGenerator._get_section_rows(pools)):
+                if writer:
+                    if section:
+                        writer.writerow('\n')
+                        CsvCompression.end_block(csvfile)
+                    writer.writerow(headers[section])
+                for start in range(0, rows, batch_size):
+                    batch = CsvGenerator._generate_rows(
+                        section, start, min(start + batch_size, rows), pools, bank
+                    )
+                    if writer:
+                        writer.writerows(batch)
+                    yield entity_names[section], headers[section], batch
+                print(f'Generated {rows} entities of {entity_names[section]}.')
 
-            print(f'Generated {EntityVerbose.BILLING_ADDRESS}es...')
+    @classmethod
+    def generate_csv(
+            cls, filename: str = 'generated.csv', rows_to_write: int = 1000,
+            workers: int = 1, seed: Optional[int] = None, personal_data_coverage: float = 1.0,
+            progress: Optional[CsvLoadProgress] = None
+    ) -> None:
+        """
+        Generate CSV file with fake data.
+        Column values are drawn from a FakerValueBank seeded with *seed*.
+        *personal_data_coverage* is the share of accounts that get personal data.
+        With *workers* > 1, sections are generated in shards by a process pool.
+        A *filename* with a compression extension (.gz) is compressed while it is written,
+        in blocks that keep its sections seekable.
+        Written rows are counted in *progress*, per batch or, with workers, per section.
+        """
+        if workers > 1:
+            CsvGenerator._generate_csv_in_parallel(
+                filename, rows_to_write, workers, seed, personal_data_coverage, progress
+            )
+            return
 
-            writer.writerow('\n')
-            writer.writerow(CsvHeaders.card_headers)
+        print(f'Generating {filename}...')
+        for entity_name, _, batch in CsvGenerator.iter_batches(
+                rows_to_write, seed=seed, personal_data_coverage=personal_data_coverage,
+                tee_filename=filename
+        ):
+            if progress:
+                progress.add_rows(entity_name, len(batch))
+        print(f'Generated a CSV with {rows_to_write} rows.')
 
-            card_ids = []
-            for i in range(0, rows_to_write // 5):
-                new_id = uuid.uuid4()
-                card_ids.append(new_id)
-                writer.writerow(
-                    CsvGenerator._generate_card_data(new_id, account_ids, billing_address_ids)
-                )
 
-            print(f'Generated {EntityVerbose.CARD}s...')
+_shard_state = {}
 
-            writer.writerow('\n')
-            writer.writerow(CsvHeaders.transaction_headers)
 
-            for i in range(0, rows_to_write // 5):
-                writer.writerow(
-                    CsvGenerator._generate_transaction_data(card_ids)
-                )
+def init_shard_worker(pools: dict, value_pools: dict, seed: int) -> None:
+    """
+    Keep the shared id pools in the worker process and build its value bank once, over the
+    shared value pools.
+    """
+    _shard_state["pools"] = pools
+    _shard_state["bank"] = FakerValueBank(seed, pools=value_pools)
 
-            print(f'Generated {EntityVerbose.TRANSACTION}s...')
-            print(f'Generated a CSV with {rows_to_write} rows.')
 
+def generate_shard(shard_filename: str, section: int, start: int, stop: int, seed: str) -> str:
+    """
+    Write rows [start, stop) of a section to a shard file. Draws are seeded per shard,
+    so the shard is reproducible. Return the shard file name.
+    """
+    bank = _shard_state["bank"]
+    bank.reseed(seed)
+    with open(shard_filename, 'w', newline='\n') as shard_file:
+        writer = csv.writer(shard_file, delimiter=';')
+        writer.writerows(
+            CsvGenerator._generate_rows(section, start, stop, _shard_state["pools"], bank)
+        )
+    return shard_filename
 
-if __name__ == '__main__':
-    CsvGenerator.generate_csv(f'../../../generated.csv')
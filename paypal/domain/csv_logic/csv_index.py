@@ -0,0 +1,184 @@
+import gzip
+from typing import (
+    BinaryIO,
+    Iterator,
+    NamedTuple,
+    Optional,
+)
+
+from paypal.domain.csv_logic.compression import (
+    BlockGzipWriter,
+    CsvCompression,
+)
+from paypal.domain.csv_logic.snapshot import (
+    CsvSnapshot,
+    SnapshotReader,
+)
+from paypal.domain.csv_logic.util import CsvHeaders
+
+
+class CsvChunk(NamedTuple):
+    """
+    Byte range [start, end) of data rows that belong to one section of a CSV file.
+    In a compressed file, the range covers whole blocks, which may include the section
+    header and the blank rows after the section.
+    """
+    header: list
+    start: int
+    end: int
+    compressed: bool = False
+
+
+class CsvSectionIndex:
+    """
+    Byte-offset index of a CSV file written by CsvGenerator.generate_csv.
+    Records where every section's rows start and end, split into chunks of about
+    *chunk_size* bytes on line boundaries, so chunks can be parsed independently.
+    Compressed files are indexed by their blocks instead, reading only the block headers
+    and the first line of every block.
+    """
+
+    DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+    @classmethod
+    def _map_header_line_to_header(cls) -> dict:
+        return {
+            ';'.join(header).encode(): header
+            for header in CsvHeaders.get_headers()
+        }
+
+    @classmethod
+    def count_rows(cls, filename: str) -> int:
+        """
+        Count data rows with a binary scan: every line except section headers and the
+        two-line blank rows written between sections. Snapshots store their row count.
+        """
+        if CsvSnapshot.is_snapshot(filename):
+            with SnapshotReader(filename) as reader:
+                return reader.count_rows()
+        lines = 0
+        with CsvCompression.open(filename, 'rb') as csvfile:
+            while block := csvfile.read(1024 * 1024):
+                lines += block.count(b'\n')
+        sections = len(CsvHeaders.get_headers())
+        return max(lines - sections - 2 * (sections - 1), 0)
+
+    @classmethod
+    def count_rows_if_cheap(cls, filename: str) -> Optional[int]:
+        """
+        Count the rows of a snapshot or an uncompressed file (see count_rows). Return None
+        for a compressed file, which would have to be decompressed once more for the count.
+        """
+        if CsvCompression.is_compressed(filename):
+            return None
+        return CsvSectionIndex.count_rows(filename)
+
+    @classmethod
+    def build(cls, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list:
+        """
+        Scan the file once and return its CsvChunk list in file (and so FK) order.
+        """
+        if CsvCompression.is_compressed(filename):
+            return CsvSectionIndex._build_compressed(filename, chunk_size)
+        header_lines = CsvSectionIndex._map_header_line_to_header()
+        chunks = []
+        header = None
+        chunk_start = None
+        offset = 0
+
+        with open(f'{filename}', 'rb') as csvfile:
+            for line in csvfile:
+                stripped = line.rstrip(b'\r\n')
+                if stripped in header_lines or stripped == b'"':
+                    if chunk_start is not None and offset > chunk_start:
+                        chunks.append(CsvChunk(header, chunk_start, offset))
+                    chunk_start = None
+                    if stripped != b'"':
+                        header = header_lines[stripped]
+                        chunk_start = offset + len(line)
+                elif chunk_start is not None and offset - chunk_start >= chunk_size:
+                    chunks.append(CsvChunk(header, chunk_start, offset))
+                    chunk_start = offset
+                offset += len(line)
+
+        if chunk_start is not None and offset > chunk_start:
+            chunks.append(CsvChunk(header, chunk_start, offset))
+        return chunks
+
+    @classmethod
+    def _build_compressed(cls, filename: str, chunk_size: int) -> list:
+        """
+        Group the blocks of a compressed file into chunks of about *chunk_size* uncompressed
+        bytes. A block that starts with a header line starts a new section.
+        """
+        header_lines = CsvSectionIndex._map_header_line_to_header()
+        blocks_per_chunk = max(chunk_size // BlockGzipWriter.BLOCK_SIZE, 1)
+        chunks = []
+        header = None
+        chunk_start = chunk_end = None
+        blocks = 0
+
+        with open(f'{filename}', 'rb') as csvfile:
+            for start, end in list(CsvCompression.iter_blocks(csvfile)):
+                first_line = CsvCompression.read_first_line(csvfile, start).rstrip(b'\r\n')
+                if first_line in header_lines or blocks == blocks_per_chunk:
+                    if chunk_start is not None:
+                        chunks.append(CsvChunk(header, chunk_start, chunk_end, True))
+                    header = header_lines.get(first_line, header)
+                    chunk_start, blocks = start, 0
+                chunk_end = end
+                blocks += 1
+
+        if chunk_start is not None:
+            chunks.append(CsvChunk(header, chunk_start, chunk_end, True))
+        return chunks
+
+    @classmethod
+    def read_chunk(cls, csvfile: BinaryIO, chunk: CsvChunk) -> bytes:
+        """
+        Read the rows of a chunk from a binary file handle, decompressing them if needed.
+        The header line a compressed chunk may start with is dropped.
+        """
+        csvfile.seek(chunk.start)
+        data = csvfile.read(chunk.end - chunk.start)
+        if not chunk.compressed:
+            return data
+        data = gzip.decompress(data)
+        header_line = ';'.join(chunk.header).encode()
+        if data.startswith(header_line) and data[len(header_line):].startswith((b'\r', b'\n')):
+            data = data[data.index(b'\n') + 1:]
+        return data
+
+    @classmethod
+    def iter_batch_chunks(
+            cls, filename: str, batch_size: int, start: int = 0, header: Optional[list] = None
+    ) -> Iterator[CsvChunk]:
+        """
+        Scan the file from byte *start* and yield chunks of at most *batch_size* rows that
+        never span two sections. A scan that starts inside a section needs its *header*.
+        """
+        header_lines = CsvSectionIndex._map_header_line_to_header()
+        chunk_start = start if header else None
+        rows = 0
+        offset = start
+
+        with open(f'{filename}', 'rb') as csvfile:
+            csvfile.seek(start)
+            for line in csvfile:
+                stripped = line.rstrip(b'\r\n')
+                if stripped in header_lines or stripped == b'"':
+                    if chunk_start is not None and rows:
+                        yield CsvChunk(header, chunk_start, offset)
+                    chunk_start, rows = None, 0
+                    if stripped != b'"':
+                        header = header_lines[stripped]
+                        chunk_start = offset + len(line)
+                elif chunk_start is not None:
+                    rows += 1
+                    if rows == batch_size:
+                        yield CsvChunk(header, chunk_start, offset + len(line))
+                        chunk_start, rows = offset + len(line), 0
+                offset += len(line)
+
+        if chunk_start is not None and rows:
+            yield CsvChunk(header, chunk_start, offset)
@@ -1,10 +1,50 @@
+import copyreg
 import csv
+import datetime
+import decimal
+import io
 import uuid
-from typing import Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Callable,
+    Iterator,
+    Optional,
+    Union,
+)
 
+import django
+from django.apps import apps
+from django.db.models import (
+    Field,
+    Model,
+)
 from injector import inject
 
-from paypal.domain.core.util import EntityVerbose
+from paypal.domain.account.models import (
+    PayPalAccount,
+    AccountPersonalData,
+)
+from paypal.domain.banking.models import (
+    BillingAddress,
+    Card,
+    Transaction,
+)
+from paypal.domain.core.util import (
+    EntityVerbose,
+    chunked,
+)
+from paypal.domain.csv_logic.compression import CsvCompression
+from paypal.domain.csv_logic.csv_index import (
+    CsvChunk,
+    CsvSectionIndex,
+)
+from paypal.domain.csv_logic.progress import CsvLoadProgress
+from paypal.domain.csv_logic.snapshot import (
+    CsvSnapshot,
+    SnapshotReader,
+    SnapshotWriter,
+)
 from paypal.domain.csv_logic.util import CsvHeaders
 
 
@@ -23,6 +63,18 @@ class CsvConverterHandler:
             for i in range(len(headers))
         }.get(tuple(header), None)
 
+    @classmethod
+    def map_header_to_model(cls, header: list) -> Optional[type[Model]]:
+        """
+        Return entity model class based on headers.
+        """
+        headers = CsvHeaders.get_headers()
+        entity_classes = [PayPalAccount, AccountPersonalData, BillingAddress, Card, Transaction]
+        return {
+            tuple(headers[i]): entity_classes[i]
+            for i in range(len(headers))
+        }.get(tuple(header), None)
+
     @classmethod
     def convert_str_to_uuid(cls, value: Union[str, int]) -> Union[str, uuid.UUID]:
         """
@@ -49,6 +101,103 @@ class CsvConverterHandler:
         }
 
 
+class CsvRowDecoder:
+    """
+    Row decoder compiled once per section from its header and the model field types.
+    Only typed columns are converted: ids to UUID, and decimal, date, datetime, boolean
+    and integer columns to their Python values. Text columns are left as they are.
+    """
+
+    TRUE_VALUES = frozenset(['True', 'true', 't', '1'])
+
+    def __init__(self, model: type[Model], header: list):
+        self.model = model
+        self.header = header
+        self.fields = [model._meta.get_field(name) for name in header]
+        self._converters = [
+            (i, converter)
+            for i, field in enumerate(self.fields)
+            if (converter := CsvRowDecoder._get_converter(field)) is not None
+        ]
+        super().__init__()
+
+    @classmethod
+    def _convert_str_to_bool(cls, value: str) -> bool:
+        return value in CsvRowDecoder.TRUE_VALUES
+
+    @classmethod
+    def _get_converter(cls, field: Field) -> Optional[Callable]:
+        """
+        Return the converter for a column, or None if the raw string is already its value.
+        Foreign keys are decoded as the primary key they point to.
+        """
+        while field.is_relation:
+            field = field.target_field
+        return {
+            "UUIDField": uuid.UUID,
+            "DecimalField": decimal.Decimal,
+            "DateField": datetime.date.fromisoformat,
+            "DateTimeField": datetime.datetime.fromisoformat,
+            "BooleanField": CsvRowDecoder._convert_str_to_bool,
+            "IntegerField": int,
+        }.get(field.get_internal_type())
+
+    def decode(self, row: list) -> tuple:
+        """
+        Convert a raw CSV row to a tuple of typed values in header order.
+        Empty typed cells become None. Cells that cannot be converted are left as they are,
+        so the row fails (or is rejected) when it is written.
+        """
+        for i, convert in self._converters:
+            value = row[i]
+            try:
+                row[i] = convert(value) if value else None
+            except (ArithmeticError, ValueError):
+                pass
+        return tuple(row)
+
+
+def reduce_uuid(value: uuid.UUID) -> tuple:
+    """
+    Pickle UUIDs as their 16 raw bytes, which is smaller and cheaper than their state dict.
+    """
+    return uuid.UUID, (None, value.bytes)
+
+
+def init_parse_worker() -> None:
+    """
+    Make model metadata available in a worker process started without fork,
+    and register the compact UUID pickling for the parsed rows sent back.
+    """
+    if not apps.ready:
+        django.setup()
+    copyreg.pickle(uuid.UUID, reduce_uuid)
+
+
+def parse_chunk(filename: str, chunk: CsvChunk) -> list:
+    """
+    Read one chunk of a section through a seeked file handle and return its rows
+    decoded to tuples.
+    """
+    with open(f'{filename}', 'rb') as csvfile:
+        return decode_chunk(chunk, CsvSectionIndex.read_chunk(csvfile, chunk))
+
+
+def decode_chunk(chunk: CsvChunk, data: bytes) -> list:
+    """
+    Decode the raw bytes of a chunk to row tuples.
+    """
+    decoder = CsvRowDecoder(CsvConverterHandler.map_header_to_model(chunk.header), chunk.header)
+    reader = csv.reader(
+        io.TextIOWrapper(io.BytesIO(data), newline='\n'), delimiter=';', quotechar='|'
+    )
+    return [
+        decoder.decode(row)
+        for row in reader
+        if row and not CsvReader._is_row_blank(row)
+    ]
+
+
 class CsvReader:
     """ CSV file parser. """
 
@@ -71,39 +220,173 @@ class CsvReader:
         """
         return row[0] == '"'
 
-    def parse(self, filename: str = 'generated.csv') -> dict:
+    def _iter_typed_batches_in_parallel(
+            self, filename: str, batch_size: int, workers: int,
+            chunk_size: int = CsvSectionIndex.DEFAULT_CHUNK_SIZE
+    ) -> Iterator[tuple]:
         """
-        Read CSV file and return a dictionary of rows related to specific models.
+        Parse chunks of the byte-offset index in a process pool and yield their batches
+        in file order. At most two chunks per worker are in flight at a time.
         """
-        entity_names = EntityVerbose.get_verbose_names()
-        result = {
-            entity_names[i]: []
-            for i in range(len(entity_names))
-        }
-        with open(f'{filename}', newline='\n') as csvfile:
+        chunks = CsvSectionIndex.build(filename, chunk_size)
+        current_entity = None
+        current_entity_counter = 0
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_parse_worker) as executor:
+            pending = deque()
+            chunk_iterator = iter(chunks)
+            for chunk in chunk_iterator:
+                pending.append((chunk, executor.submit(parse_chunk, filename, chunk)))
+                if len(pending) >= workers * 2:
+                    break
+
+            while pending:
+                chunk, future = pending.popleft()
+                if (next_chunk := next(chunk_iterator, None)) is not None:
+                    pending.append(
+                        (next_chunk, executor.submit(parse_chunk, filename, next_chunk))
+                    )
+
+                entity_name = self.csv_converter.map_header_to_entity_name(chunk.header)
+                if entity_name != current_entity:
+                    if current_entity:
+                        print(f'Found {current_entity_counter} entities of {current_entity}.')
+                        current_entity_counter = 0
+                    current_entity = entity_name
+                    print(f'Reading entities of class: {current_entity}...')
+
+                rows = future.result()
+                current_entity_counter += len(rows)
+                for batch in chunked(rows, batch_size):
+                    yield entity_name, chunk.header, batch
+        if current_entity:
+            print(f'Found {current_entity_counter} entities of {current_entity}.')
+
+    @classmethod
+    def _iter_snapshot_batches(cls, filename: str, batch_size: int) -> Iterator[tuple]:
+        with SnapshotReader(filename) as reader:
+            for section in reader.sections:
+                print(f'Reading entities of class: {section["entity"]}...')
+                yield from reader.iter_typed_batches(batch_size, section["entity"])
+                print(f'Found {section["rows"]} entities of {section["entity"]}.')
+
+    def iter_typed_batches(
+            self, filename: str = 'generated.csv', batch_size: int = 1000, workers: int = 1
+    ) -> Iterator[tuple]:
+        """
+        Read CSV file section by section and yield (entity name, header, rows) batches of at
+        most *batch_size* rows, where rows are tuples decoded by the section's CsvRowDecoder.
+        Memory stays bounded by the batch size instead of the file size.
+        With *workers* > 1, chunks of the sections are parsed in a process pool.
+        Compressed files are decompressed on the fly; only those written in blocks can be
+        split into chunks for the workers. Snapshots are read through mmap, without workers.
+        """
+        if CsvSnapshot.is_snapshot(filename):
+            yield from self._iter_snapshot_batches(filename, batch_size)
+            return
+        if workers > 1 and (
+                not CsvCompression.is_compressed(filename) or CsvCompression.is_seekable(filename)
+        ):
+            yield from self._iter_typed_batches_in_parallel(filename, batch_size, workers)
+            return
+
+        with CsvCompression.open(filename, newline='\n') as csvfile:
             reader = csv.reader(csvfile, delimiter=';', quotechar='|')
             current_entity = None
             current_header = None
+            current_decoder = None
             current_entity_counter = 0
+            batch = []
 
             for row in reader:
                 if CsvReader._is_row_a_header(row):
+                    if batch:
+                        yield current_entity, current_header, batch
+                        batch = []
                     if current_entity:
                         print(f'Found {current_entity_counter} entities of {current_entity}.')
                         current_entity_counter = 0
 
                     current_entity = self.csv_converter.map_header_to_entity_name(row)
                     current_header = row
+                    current_decoder = CsvRowDecoder(
+                        self.csv_converter.map_header_to_model(row), row
+                    )
                     print(f'Reading entities of class: {current_entity}...')
                 elif not CsvReader._is_row_blank(row):
-                    for i in range(len(row)):
-                        row[i] = self.csv_converter.convert_str_to_uuid(row[i])
-
-                    result[current_entity].append(
-                        self.csv_converter.convert_row_to_dict(current_header, row)
-                    )
+                    batch.append(current_decoder.decode(row))
+                    if len(batch) >= batch_size:
+                        yield current_entity, current_header, batch
+                        batch = []
 
                     current_entity_counter += 1
+            if batch:
+                yield current_entity, current_header, batch
             print(f'Found {current_entity_counter} entities of {current_entity}.')
 
+    def write_snapshot(
+            self, filename: str, snapshot_filename: str,
+            progress: Optional[CsvLoadProgress] = None
+    ) -> int:
+        """
+        Convert CSV file to a snapshot (see CsvSnapshot), counting the converted rows in
+        *progress*. Return the number of rows.
+        """
+        with SnapshotWriter(snapshot_filename) as writer:
+            for entity_name, header, rows in self.iter_typed_batches(
+                    filename, CsvSnapshot.ROW_GROUP_SIZE
+            ):
+                writer.write(
+                    entity_name, header, self.csv_converter.map_header_to_model(header), rows
+                )
+                if progress:
+                    progress.add_rows(entity_name, len(rows))
+        print(f'Converted {filename} to {snapshot_filename} ({writer.rows} rows).')
+        return writer.rows
+
+    def iter_resumable_batches(
+            self, filename: str = 'generated.csv', batch_size: int = 1000, start: int = 0,
+            entity_name: Optional[str] = None
+    ) -> Iterator[tuple]:
+        """
+        Read CSV file from byte *start* and yield (entity name, rows, end offset) batches of
+        at most *batch_size* rows, where rows are dicts of column names and typed values and
+        the end offset is where the next batch starts. Resuming inside a section needs its
+        *entity_name*; sections before *start* are not read at all.
+        """
+        header = None
+        if entity_name:
+            header = CsvHeaders.get_headers()[EntityVerbose.get_verbose_names().index(entity_name)]
+        with open(f'{filename}', 'rb') as csvfile:
+            for chunk in CsvSectionIndex.iter_batch_chunks(filename, batch_size, start, header):
+                csvfile.seek(chunk.start)
+                rows = decode_chunk(chunk, csvfile.read(chunk.end - chunk.start))
+                yield (
+                    self.csv_converter.map_header_to_entity_name(chunk.header),
+                    [dict(zip(chunk.header, row)) for row in rows],
+                    chunk.end,
+                )
+
+    def iter_batches(
+            self, filename: str = 'generated.csv', batch_size: int = 1000, workers: int = 1
+    ) -> Iterator[tuple]:
+        """
+        Read CSV file section by section and yield (entity name, rows) batches of at most
+        *batch_size* rows, where rows are dicts of column names and typed values.
+        """
+        for entity_name, header, rows in self.iter_typed_batches(filename, batch_size, workers):
+            yield entity_name, [dict(zip(header, row)) for row in rows]
+
+    def parse(self, filename: str = 'generated.csv') -> dict:
+        """
+        Read CSV file and return a dictionary of rows related to specific models.
+        """
+        entity_names = EntityVerbose.get_verbose_names()
+        result = {
+            entity_names[i]: []
+            for i in range(len(entity_names))
+        }
+        for entity_name, rows in self.iter_batches(filename):
+            result[entity_name].extend(rows)
+
         return result
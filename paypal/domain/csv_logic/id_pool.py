@@ -0,0 +1,86 @@
+import copy
+import math
+import random
+import uuid
+from collections.abc import Sequence
+from typing import (
+    Iterable,
+    Union,
+)
+
+from paypal.domain.core.util import uuid_from_int
+
+
+class IdPool(Sequence):
+    """
+    Pool of *count* distinct version 4 UUIDs derived from *seed*, for CsvGenerator.
+    Ids are not stored: id i is computed from i on access, by a seeded bijection
+    (i * odd multiplier + increment, modulo 2 ** 122) onto the 122 random bits of a version 4
+    UUID, so a pool of any size takes a few integers of memory and is cheap to send to
+    worker processes. Foreign keys are drawn as random indexes, turned into ids in bulk.
+    A pool can also be a view over a subset of another pool's ids, picked in a seeded
+    order by an affine permutation of the indexes (see *shuffled*).
+    """
+
+    RANDOM_BITS = 122
+    RANDOM_MASK = (1 << RANDOM_BITS) - 1
+    LOW_MASK = (1 << 62) - 1
+    # Version 4 and the RFC 4122 variant, at their places in UUID.int.
+    VERSION_BITS = (4 << 76) | (2 << 62)
+
+    def __init__(self, seed: str, count: int):
+        rng = random.Random(seed)
+        self.count = count
+        self._multiplier = rng.getrandbits(IdPool.RANDOM_BITS) | 1
+        self._increment = rng.getrandbits(IdPool.RANDOM_BITS)
+        self._source_count = count
+        self._start = 0
+        self._step = 1
+        super().__init__()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[uuid.UUID, list]:
+        if isinstance(index, slice):
+            return self.get_ids(range(*index.indices(self.count)))
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('id pool index out of range')
+        return self.get_ids((index,))[0]
+
+    def get_ids(self, indexes: Iterable[int]) -> list:
+        """
+        Compute the ids at *indexes*, which must be in range.
+        """
+        start, step, source_count = self._start, self._step, self._source_count
+        multiplier, increment = self._multiplier, self._increment
+        random_mask, low_mask = IdPool.RANDOM_MASK, IdPool.LOW_MASK
+        version_bits = IdPool.VERSION_BITS
+        ids = []
+        for index in indexes:
+            bits = ((start + step * index) % source_count * multiplier + increment) & random_mask
+            ids.append(uuid_from_int(
+                (bits >> 74) << 80 | (bits >> 62 & 0xfff) << 64 | bits & low_mask | version_bits
+            ))
+        return ids
+
+    def shuffled(self, count: int, rng: random.Random) -> "IdPool":
+        """
+        Return a pool of *count* ids of this pool, each at most once, in an order drawn
+        from *rng*: index j maps to (start + step * j) mod len(self), with a random start
+        and a random step coprime with len(self).
+        """
+        if count > self.count or self.count != self._source_count:
+            raise ValueError('ids can only be picked from a whole pool, at most once each')
+        pool = copy.copy(self)
+        pool.count = count
+        if self.count > 1:
+            step = rng.randrange(1, self.count)
+            while math.gcd(step, self.count) != 1:
+                step = rng.randrange(1, self.count)
+            start = rng.randrange(self.count)
+            pool._start = (self._start + self._step * start) % self._source_count
+            pool._step = self._step * step % self._source_count
+        return pool
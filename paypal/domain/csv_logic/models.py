@@ -0,0 +1,23 @@
+from django.db import models
+
+from paypal.domain.core.models import BaseUUIDModel
+
+
+class CsvLoadCheckpoint(BaseUUIDModel):
+    """
+    Progress of a resumable CSV load: the last committed batch of *filename* ended at byte
+    *offset*, inside the section of *entity*. Written in the same transaction as the batch.
+    """
+
+    filename = models.CharField(max_length=255, unique=True)
+    file_size = models.BigIntegerField()
+    entity = models.CharField(max_length=100)
+    offset = models.BigIntegerField()
+    rows_committed = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "CSV Load Checkpoint"
+        verbose_name_plural = "CSV Load Checkpoints"
+
+    def __str__(self) -> str:
+        return f'{self.filename} | {self.entity} @ {self.offset} ({self.rows_committed} rows)'
@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+from typing import (
+    Iterable,
+    Iterator,
+)
+
+
+class BatchPipeline:
+    """
+    Produce batches in a background thread and hand them to the consuming thread through
+    a bounded queue, so producing (parsing) and consuming (writing to the database) overlap.
+    A full queue blocks the producer (back-pressure), an empty queue blocks the consumer.
+    Batches come out in the order they were produced.
+    """
+
+    DEFAULT_QUEUE_SIZE = 8
+    _POLL_TIMEOUT = 0.1
+    _DONE = object()
+
+    def __init__(self, batches: Iterable, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.batches = batches
+        self.queue = queue.Queue(maxsize=max(queue_size, 1))
+        self.producer_blocked = 0.0
+        self.consumer_blocked = 0.0
+        self.elapsed = 0.0
+        self._error = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._produce, name="csv-loader-producer", daemon=True
+        )
+        super().__init__()
+
+    def _put(self, item) -> bool:
+        """
+        Put an item into the queue, waiting while it is full. Return False if the consumer
+        has stopped in the meantime.
+        """
+        started = time.perf_counter()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self.queue.put(item, timeout=BatchPipeline._POLL_TIMEOUT)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        finally:
+            self.producer_blocked += time.perf_counter() - started
+
+    def _produce(self) -> None:
+        try:
+            for batch in self.batches:
+                if not self._put(batch):
+                    break
+        except BaseException as e:
+            self._error = e
+        finally:
+            if hasattr(self.batches, "close"):
+                self.batches.close()
+            self._put(BatchPipeline._DONE)
+
+    def __iter__(self) -> Iterator:
+        started = time.perf_counter()
+        self._thread.start()
+        try:
+            while True:
+                waiting_since = time.perf_counter()
+                item = self.queue.get()
+                self.consumer_blocked += time.perf_counter() - waiting_since
+                if item is BatchPipeline._DONE:
+                    break
+                yield item
+            if self._error is not None:
+                raise self._error
+        finally:
+            self._stopped.set()
+            self._thread.join()
+            self.elapsed = time.perf_counter() - started
+
+    def get_blocked_seconds(self) -> dict:
+        """
+        Return the time each stage spent waiting for the other one.
+        The stage that waits less is the bottleneck.
+        """
+        return {
+            "elapsed": round(self.elapsed, 3),
+            "producer_blocked": round(self.producer_blocked, 3),
+            "consumer_blocked": round(self.consumer_blocked, 3),
+        }
@@ -0,0 +1,123 @@
+import threading
+import time
+from typing import Optional
+
+from paypal.domain.core.exceptions import LoadCancelledError
+from paypal.domain.csv_logic.constants import CsvLoaderConstants
+
+
+class CsvLoadProgress:
+    """
+    Progress of one database load: its phase and the rows written per entity.
+    Also carries the cancellation flag that the loader checks between batches.
+    """
+
+    FINISHED_PHASES = [
+        CsvLoaderConstants.JobPhases.DONE,
+        CsvLoaderConstants.JobPhases.FAILED,
+        CsvLoaderConstants.JobPhases.CANCELLED,
+    ]
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.phase = CsvLoaderConstants.JobPhases.QUEUED
+        self.rows_done = {}
+        self.rows_total = None
+        self.error = None
+        self.flush_seconds = None
+        self.index_seconds = None
+        self.swap_seconds = None
+        self.upsert_summary = None
+        self.blocked_seconds = None
+        self.rejected = None
+        self.hashes_per_second = None
+        self.phase_seconds = {}
+        self.created_at = time.time()
+        self._phase_started_at = time.perf_counter()
+        self.loading_started_at = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+        self._rows_lock = threading.Lock()
+        super().__init__()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.phase in CsvLoadProgress.FINISHED_PHASES
+
+    def set_phase(self, phase: str, cancellable: bool = True) -> None:
+        """
+        Move on to *phase*, adding the time spent in the previous one to phase_seconds.
+        Unless *cancellable* is False, a cancelled load stops here.
+        """
+        if cancellable and phase not in CsvLoadProgress.FINISHED_PHASES:
+            self.check_cancelled()
+        now = time.perf_counter()
+        self.phase_seconds[self.phase] = (
+            self.phase_seconds.get(self.phase, 0.0) + now - self._phase_started_at
+        )
+        self._phase_started_at = now
+        self.phase = phase
+        if phase == CsvLoaderConstants.JobPhases.LOADING and not self.loading_started_at:
+            self.loading_started_at = time.time()
+        if self.is_finished:
+            self.finished_at = time.time()
+
+    def _count_rows(self, entity_name: str, rows: int) -> None:
+        with self._rows_lock:
+            self.rows_done[entity_name] = self.rows_done.get(entity_name, 0) + rows
+
+    def add_rows(self, entity_name: str, rows: int) -> None:
+        self.check_cancelled()
+        self._count_rows(entity_name, rows)
+
+    def remove_rows(self, entity_name: str, rows: int) -> None:
+        """
+        Take back rows counted by add_rows that were rejected while being written,
+        possibly from a writer thread. Never cancels: it runs in the middle of a batch.
+        """
+        self._count_rows(entity_name, -rows)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check_cancelled(self) -> None:
+        """
+        Raise LoadCancelledError if the load was cancelled.
+        """
+        if self._cancelled.is_set():
+            raise LoadCancelledError(self.job_id)
+
+    def get_rows_per_second(self) -> Optional[float]:
+        if not self.loading_started_at:
+            return None
+        elapsed = (self.finished_at or time.time()) - self.loading_started_at
+        return sum(self.rows_done.values()) / elapsed if elapsed > 0 else None
+
+    def get_eta_seconds(self) -> Optional[float]:
+        rows_per_second = self.get_rows_per_second()
+        if self.is_finished:
+            return 0.0
+        if not rows_per_second or self.rows_total is None:
+            return None
+        return max(self.rows_total - sum(self.rows_done.values()), 0) / rows_per_second
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.job_id,
+            "phase": self.phase,
+            "rows_done": dict(self.rows_done),
+            "rows_total": self.rows_total,
+            "rows_per_second": self.get_rows_per_second(),
+            "eta_seconds": self.get_eta_seconds(),
+            "flush_seconds": self.flush_seconds,
+            "index_seconds": self.index_seconds,
+            "swap_seconds": self.swap_seconds,
+            "upsert_summary": self.upsert_summary,
+            "blocked_seconds": self.blocked_seconds,
+            "rejected": self.rejected,
+            "hashes_per_second": self.hashes_per_second,
+            "phase_seconds": {
+                phase: round(seconds, 3) for phase, seconds in self.phase_seconds.items()
+            },
+            "error": self.error,
+        }
@@ -0,0 +1,42 @@
+import csv
+import threading
+
+
+class CsvRejectWriter:
+    """
+    CSV file of the rows a load rejected, laid out like a generated file: one section per
+    entity, with the reason of the rejection as an extra last column.
+    Rows may be added from several writer threads.
+    """
+
+    REASON_COLUMN = "reject_reason"
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.counts = {}
+        self._csvfile = None
+        self._writer = None
+        self._entity_name = None
+        self._lock = threading.Lock()
+        super().__init__()
+
+    def add(self, entity_name: str, row: dict, reason: str) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._csvfile = open(f'{self.filename}', 'w', newline='\n')
+                self._writer = csv.writer(self._csvfile, delimiter=';')
+            if entity_name != self._entity_name:
+                if self._entity_name:
+                    self._writer.writerow('\n')
+                self._writer.writerow(list(row) + [CsvRejectWriter.REASON_COLUMN])
+                self._entity_name = entity_name
+            self._writer.writerow(
+                ['' if value is None else value for value in row.values()] + [reason]
+            )
+            self.counts[entity_name] = self.counts.get(entity_name, 0) + 1
+
+    def close(self) -> None:
+        if self._csvfile:
+            self._csvfile.close()
+        if self.counts:
+            print(f'Rejected {sum(self.counts.values())} rows, see {self.filename}.')
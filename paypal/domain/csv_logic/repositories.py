@@ -0,0 +1,32 @@
+import os
+from typing import Optional
+
+from paypal.domain.core.abstract import AbstractRepository
+from paypal.domain.csv_logic.models import CsvLoadCheckpoint
+
+
+class CsvLoadCheckpointRepository(AbstractRepository):
+    BASE_CLASS = CsvLoadCheckpoint
+
+    def get_by_filename(self, filename: str) -> Optional[BASE_CLASS]:
+        try:
+            return self.BASE_CLASS.objects.get(filename=os.path.abspath(filename))
+        except self.BASE_CLASS.DoesNotExist:
+            return None
+
+    def record(self, filename: str, entity: str, offset: int, rows_committed: int) -> None:
+        """
+        Create or move the checkpoint of a file.
+        """
+        self.BASE_CLASS.objects.update_or_create(
+            filename=os.path.abspath(filename),
+            defaults={
+                "file_size": os.path.getsize(filename),
+                "entity": entity,
+                "offset": offset,
+                "rows_committed": rows_committed,
+            }
+        )
+
+    def delete_by_filename(self, filename: str) -> None:
+        self.BASE_CLASS.objects.filter(filename=os.path.abspath(filename)).delete()
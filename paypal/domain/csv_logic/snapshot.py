@@ -0,0 +1,371 @@
+import csv
+import datetime
+import decimal
+import json
+import mmap
+import struct
+from array import array
+from typing import (
+    Iterable,
+    Iterator,
+    Optional,
+)
+
+from django.db.models import Model
+
+from paypal.domain.core.util import uuid_from_int
+from paypal.domain.csv_logic.compression import CsvCompression
+from paypal.domain.csv_logic.progress import CsvLoadProgress
+
+
+class CsvSnapshot:
+    """
+    Binary snapshot of a dataset in the CsvHeaders layout, for reference datasets that are
+    loaded again and again.
+    Every section is stored in row groups of up to ROW_GROUP_SIZE rows, and every row group
+    column by column: UUIDs as 16 raw bytes, decimals as integers scaled by the field's
+    decimal places, dates as days and datetimes as microseconds since the epoch, booleans
+    and integers as fixed-width numbers, and text as UTF-8 data plus an array of 4-byte
+    character offsets into it.
+    Column blocks are 8-byte aligned. A JSON footer describes sections, row groups and
+    the offset and length of every column block.
+    """
+
+    EXTENSION = ".snap"
+    MAGIC = b"PPSNAP02"
+    TRAILER = struct.Struct("<Q8s")
+    ROW_GROUP_SIZE = 64 * 1024
+    ALIGNMENT = 8
+
+    NULL_INT = -2 ** 63
+    NULL_DATE = -2 ** 31
+    NULL_UUID = bytes(16)
+    NULL_BOOL = 2
+    MAX_TEXT_OFFSET = 2 ** 32 - 1
+    EPOCH = datetime.datetime(1970, 1, 1)
+    EPOCH_ORDINAL = EPOCH.toordinal()
+    MICROSECOND = datetime.timedelta(microseconds=1)
+
+    KINDS = {
+        "UUIDField": "uuid",
+        "DecimalField": "decimal",
+        "DateField": "date",
+        "DateTimeField": "datetime",
+        "BooleanField": "bool",
+        "IntegerField": "int",
+    }
+    TEXT = "text"
+
+    @classmethod
+    def is_snapshot(cls, filename: str) -> bool:
+        return str(filename).endswith(CsvSnapshot.EXTENSION)
+
+    @classmethod
+    def get_columns(cls, model: type[Model], header: list) -> list:
+        """
+        Return the (kind, decimal places) of every column of a section.
+        Foreign keys are stored as the primary key they point to.
+        """
+        columns = []
+        for name in header:
+            field = model._meta.get_field(name)
+            while field.is_relation:
+                field = field.target_field
+            kind = CsvSnapshot.KINDS.get(field.get_internal_type(), CsvSnapshot.TEXT)
+            columns.append((kind, field.decimal_places if kind == "decimal" else 0))
+        return columns
+
+    @classmethod
+    def to_csv(
+            cls, snapshot_filename: str, csv_filename: str,
+            progress: Optional[CsvLoadProgress] = None
+    ) -> int:
+        """
+        Convert a snapshot back to a CSV file in the layout of CsvGenerator.generate_csv,
+        compressed if *csv_filename* has a compression extension, counting the converted
+        rows in *progress*. Return the number of rows.
+        The rows read back the same as from the original file, but the file is not
+        byte-identical to it: values are written from their typed form, so decimals get
+        all their decimal places (1453.4 becomes 1453.40).
+        """
+        rows_written = 0
+        entity_name = None
+        with SnapshotReader(snapshot_filename) as reader:
+            with CsvCompression.open(csv_filename, 'w', newline='\n') as csvfile:
+                writer = csv.writer(csvfile, delimiter=';')
+                for batch_entity_name, header, rows in reader.iter_typed_batches():
+                    if batch_entity_name != entity_name:
+                        if entity_name:
+                            writer.writerow('\n')
+                            CsvCompression.end_block(csvfile)
+                        writer.writerow(header)
+                        entity_name = batch_entity_name
+                    writer.writerows(rows)
+                    rows_written += len(rows)
+                    if progress:
+                        progress.add_rows(batch_entity_name, len(rows))
+        print(f'Converted {snapshot_filename} to {csv_filename} ({rows_written} rows).')
+        return rows_written
+
+
+class SnapshotWriter:
+    """
+    Write typed row batches (as read by CsvReader.iter_typed_batches) to a snapshot,
+    section by section. Rows are buffered up to a row group at a time.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.rows = 0
+        self._file = None
+        self._sections = []
+        self._rows = []
+        super().__init__()
+
+    def _write_block(self, data: bytes) -> list:
+        """
+        Write one 8-byte aligned column block and return its [offset, length].
+        """
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.write(bytes(-len(data) % CsvSnapshot.ALIGNMENT))
+        return [offset, len(data)]
+
+    @classmethod
+    def _to_scaled_int(cls, value, scale: int) -> int:
+        if isinstance(value, float):
+            value = str(value)
+        return int(decimal.Decimal(value).scaleb(scale).to_integral_value())
+
+    def _encode_column(self, kind: str, scale: int, values: list) -> list:
+        """
+        Write the block(s) of one column of a row group and return their [offset, length].
+        """
+        if kind == "uuid":
+            return self._write_block(b''.join(
+                CsvSnapshot.NULL_UUID if value is None else value.bytes for value in values
+            ))
+        if kind == "decimal":
+            return self._write_block(array('q', [
+                CsvSnapshot.NULL_INT if value is None
+                else SnapshotWriter._to_scaled_int(value, scale)
+                for value in values
+            ]).tobytes())
+        if kind == "date":
+            return self._write_block(array('i', [
+                CsvSnapshot.NULL_DATE if value is None
+                else value.toordinal() - CsvSnapshot.EPOCH_ORDINAL
+                for value in values
+            ]).tobytes())
+        if kind == "datetime":
+            return self._write_block(array('q', [
+                CsvSnapshot.NULL_INT if value is None
+                else (value - CsvSnapshot.EPOCH) // CsvSnapshot.MICROSECOND
+                for value in values
+            ]).tobytes())
+        if kind == "bool":
+            return self._write_block(bytes(
+                CsvSnapshot.NULL_BOOL if value is None else int(value) for value in values
+            ))
+        if kind == "int":
+            return self._write_block(array('q', [
+                CsvSnapshot.NULL_INT if value is None else int(value) for value in values
+            ]).tobytes())
+        values = [value or '' for value in values]
+        offsets = array('I', [0])
+        offset = 0
+        for value in values:
+            offset += len(value)
+            if offset > CsvSnapshot.MAX_TEXT_OFFSET:
+                raise ValueError('a text column of a row group is too long for a snapshot.')
+            offsets.append(offset)
+        return (
+            self._write_block(offsets.tobytes())
+            + self._write_block(''.join(values).encode())
+        )
+
+    def _flush_row_group(self) -> None:
+        if not self._rows:
+            return
+        section = self._sections[-1]
+        section["row_groups"].append({
+            "rows": len(self._rows),
+            "columns": [
+                self._encode_column(kind, scale, list(values))
+                for (kind, scale), values in zip(section["columns"], zip(*self._rows))
+            ],
+        })
+        section["rows"] += len(self._rows)
+        self.rows += len(self._rows)
+        self._rows = []
+
+    def write(
+            self, entity_name: str, header: list, model: type[Model], rows: Iterable[tuple]
+    ) -> None:
+        """
+        Append typed rows of *model* in *header* order; a new entity name starts a section.
+        """
+        if not self._sections or self._sections[-1]["entity"] != entity_name:
+            self._flush_row_group()
+            self._sections.append({
+                "entity": entity_name,
+                "header": header,
+                "columns": CsvSnapshot.get_columns(model, header),
+                "rows": 0,
+                "row_groups": [],
+            })
+        for row in rows:
+            self._rows.append(row)
+            if len(self._rows) >= CsvSnapshot.ROW_GROUP_SIZE:
+                self._flush_row_group()
+
+    def __enter__(self) -> "SnapshotWriter":
+        self._file = open(f'{self.filename}', 'wb')
+        self._file.write(CsvSnapshot.MAGIC)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                self._flush_row_group()
+                footer = json.dumps({"sections": self._sections}).encode()
+                self._file.write(footer)
+                self._file.write(CsvSnapshot.TRAILER.pack(len(footer), CsvSnapshot.MAGIC))
+        finally:
+            self._file.close()
+
+
+class SnapshotReader:
+    """
+    Read a snapshot through mmap. Fixed-width columns are sliced straight out of the
+    mapping as typed memoryviews, without copying, and turned into batch tuples in the
+    layout of CsvReader.iter_typed_batches.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.sections = []
+        self._file = None
+        self._mmap = None
+        super().__init__()
+
+    def __enter__(self) -> "SnapshotReader":
+        self._file = open(f'{self.filename}', 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        footer_length, magic = CsvSnapshot.TRAILER.unpack_from(
+            self._mmap, len(self._mmap) - CsvSnapshot.TRAILER.size
+        )
+        if magic != CsvSnapshot.MAGIC or self._mmap[:len(magic)] != CsvSnapshot.MAGIC:
+            raise ValueError(f'{self.filename} is not a snapshot file of this version.')
+        footer_end = len(self._mmap) - CsvSnapshot.TRAILER.size
+        self.sections = json.loads(self._mmap[footer_end - footer_length:footer_end])["sections"]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def count_rows(self) -> int:
+        return sum(section["rows"] for section in self.sections)
+
+    @classmethod
+    def _decode_column(
+            cls, kind: str, scale: int, views: list, start: int, stop: int
+    ) -> list:
+        """
+        Decode rows [start, stop) of a column of a row group from its memoryviews.
+        """
+        if kind == "uuid":
+            # One copy of the rows' bytes: slicing bytes is cheaper than slicing the mapping.
+            data = views[0][start * 16:stop * 16].tobytes()
+            from_bytes = int.from_bytes
+            return [
+                uuid_from_int(number) if number else None
+                for number in [
+                    from_bytes(data[offset:offset + 16], 'big')
+                    for offset in range(0, len(data), 16)
+                ]
+            ]
+        if kind == "text":
+            offsets, text = views
+            bounds = offsets[start:stop + 1].tolist()
+            return [text[bounds[i]:bounds[i + 1]] for i in range(stop - start)]
+        numbers = views[0][start:stop].tolist()
+        if kind == "decimal":
+            scale = -scale
+            null = CsvSnapshot.NULL_INT
+            return [
+                None if number == null else decimal.Decimal(number).scaleb(scale)
+                for number in numbers
+            ]
+        if kind == "date":
+            from_ordinal = datetime.date.fromordinal
+            epoch_ordinal = CsvSnapshot.EPOCH_ORDINAL
+            null = CsvSnapshot.NULL_DATE
+            return [
+                None if number == null else from_ordinal(epoch_ordinal + number)
+                for number in numbers
+            ]
+        if kind == "datetime":
+            epoch, timedelta = CsvSnapshot.EPOCH, datetime.timedelta
+            null = CsvSnapshot.NULL_INT
+            return [
+                None if number == null else epoch + timedelta(microseconds=number)
+                for number in numbers
+            ]
+        if kind == "bool":
+            return [(False, True, None)[number] for number in numbers]
+        null = CsvSnapshot.NULL_INT
+        return [None if number == null else number for number in numbers]
+
+    def _get_views(self, kind: str, blocks: list) -> list:
+        """
+        Return typed memoryviews over the column block(s) of a row group. The text of a text
+        column is decoded once for the whole row group.
+        """
+        buffer = memoryview(self._mmap)
+        views = [
+            buffer[offset:offset + length]
+            for offset, length in zip(blocks[::2], blocks[1::2])
+        ]
+        buffer.release()
+        if kind == "text":
+            text = str(views[1], 'utf-8')
+            views[1].release()
+            return [views[0].cast('I'), text]
+        if kind in ("decimal", "datetime", "int"):
+            return [views[0].cast('q')]
+        if kind == "date":
+            return [views[0].cast('i')]
+        return views
+
+    def iter_typed_batches(
+            self, batch_size: int = CsvSnapshot.ROW_GROUP_SIZE,
+            entity_name: Optional[str] = None
+    ) -> Iterator[tuple]:
+        """
+        Yield (entity name, header, rows) batches of at most *batch_size* rows, where rows
+        are tuples in header order. A batch never spans two row groups.
+        With *entity_name*, only that section is read.
+        """
+        for section in self.sections:
+            if entity_name and section["entity"] != entity_name:
+                continue
+            columns = section["columns"]
+            for row_group in section["row_groups"]:
+                views = [
+                    self._get_views(kind, blocks)
+                    for (kind, _), blocks in zip(columns, row_group["columns"])
+                ]
+                try:
+                    for start in range(0, row_group["rows"], batch_size):
+                        stop = min(start + batch_size, row_group["rows"])
+                        yield section["entity"], section["header"], list(zip(*[
+                            SnapshotReader._decode_column(kind, scale, column_views, start, stop)
+                            for (kind, scale), column_views in zip(columns, views)
+                        ]))
+                finally:
+                    for column_views in views:
+                        for view in column_views:
+                            if isinstance(view, memoryview):
+                                view.release()
@@ -0,0 +1,117 @@
+import datetime
+import random
+from typing import (
+    Optional,
+    Sequence,
+)
+
+from faker import Faker
+
+
+class FakerValueBank:
+    """
+    Pre-generated pools of fake values for CsvGenerator.
+    One seeded Faker fills every pool once in bulk, and rows draw column values from the
+    pools with one random index selection per column. Filled pools can be handed to the
+    banks of worker processes, so shards share them instead of filling their own.
+    """
+
+    DEFAULT_POOL_SIZE = 10000
+
+    PROVIDERS = {
+        "name": lambda faker: faker.name(),
+        "date_of_birth": lambda faker: faker.date_of_birth(),
+        "country": lambda faker: faker.country(),
+        "phone_number": lambda faker: faker.msisdn(),
+        "password": lambda faker: faker.password(),
+        "user_name": lambda faker: faker.user_name(),
+        "email_domain": lambda faker: faker.free_email_domain(),
+        "street_address": lambda faker: faker.street_address(),
+        "sentence": lambda faker: faker.sentence(),
+        "city": lambda faker: faker.city(),
+        "state_abbr": lambda faker: faker.state_abbr(),
+        "zipcode": lambda faker: faker.zipcode(),
+        "card_number": lambda faker: faker.credit_card_number(),
+        # Card.cvv takes exactly 4 digits; Faker's security codes are mostly 3.
+        "card_security_code": lambda faker: f'{faker.random_int(0, 9999):04d}',
+        "card_expire": lambda faker: faker.credit_card_expire(),
+        "date_time_this_year": lambda faker: datetime.datetime.strftime(
+            faker.date_time_this_year(), "%Y-%m-%d %H:%M:%S"
+        ),
+    }
+
+    def __init__(
+            self, seed: Optional[int] = None, pool_size: int = DEFAULT_POOL_SIZE,
+            pools: Optional[dict] = None
+    ):
+        self.seed = seed
+        self.pool_size = pool_size
+        self.faker = Faker()
+        self.faker.seed_instance(seed)
+        self.random = random.Random(seed)
+        self._pools = dict(pools or {})
+        super().__init__()
+
+    @classmethod
+    def get_pool_size(cls, rows: int) -> int:
+        """
+        Return the pool size for sections of at most *rows* rows: a pool larger than the
+        number of values drawn from it only costs Faker calls.
+        """
+        return max(min(FakerValueBank.DEFAULT_POOL_SIZE, rows), 1)
+
+    def reseed(self, seed) -> None:
+        """
+        Reseed the draws only; pools stay the same, so shards share them.
+        """
+        self.random.seed(seed)
+
+    def get_pool(self, name: str) -> list:
+        if name not in self._pools:
+            provider = FakerValueBank.PROVIDERS[name]
+            self._pools[name] = [provider(self.faker) for _ in range(self.pool_size)]
+        return self._pools[name]
+
+    def get_pools(self) -> dict:
+        """
+        Fill every pool and return them by name, e.g. to share them with other banks.
+        """
+        for name in FakerValueBank.PROVIDERS:
+            self.get_pool(name)
+        return self._pools
+
+    def draw(self, name: str, k: int) -> list:
+        """
+        Draw *k* values from a pool.
+        """
+        return self.random.choices(self.get_pool(name), k=k)
+
+    def choices(self, population: Sequence, k: int) -> list:
+        """
+        Draw *k* values from any population, e.g. an id pool.
+        """
+        return self.random.choices(population, k=k)
+
+    def indexes(self, n: int, k: int) -> list:
+        """
+        Draw *k* indexes into a population of *n* items, as choices() would pick them.
+        """
+        return self.random.choices(range(n), k=k)
+
+    def amounts(self, upper_bound: int, k: int) -> list:
+        """
+        Draw *k* amounts with two decimal places in [0, upper_bound].
+        """
+        return [cents / 100 for cents in self.random.choices(range(upper_bound * 100 + 1), k=k)]
+
+    def emails(self, start: int, k: int) -> list:
+        """
+        Return *k* emails that are unique within a file: the row index in the section
+        (from *start*) is part of the local part.
+        """
+        return [
+            f'{user_name}.{index}@{domain}'
+            for index, user_name, domain in zip(
+                range(start, start + k), self.draw("user_name", k), self.draw("email_domain", k)
+            )
+        ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.4 on 2026-10-17 15:30
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domain', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CsvLoadCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('filename', models.CharField(max_length=255, unique=True)),
+                ('file_size', models.BigIntegerField()),
+                ('entity', models.CharField(max_length=100)),
+                ('offset', models.BigIntegerField()),
+                ('rows_committed', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'CSV Load Checkpoint',
+                'verbose_name_plural': 'CSV Load Checkpoints',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.4 on 2026-10-17 18:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('domain', '0002_csvloadcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='accountpersonaldata',
+            name='password',
+            field=models.CharField(max_length=128, validators=[django.core.validators.MinLengthValidator(8)]),
+        ),
+    ]
@@ -0,0 +1,73 @@
+import datetime
+import decimal
+
+from django.test import TestCase
+
+from paypal.domain.account.constants import AccountConstants
+from paypal.domain.account.models import (
+    AccountPersonalData,
+    PayPalAccount,
+)
+from paypal.domain.account.repositories import AccountPersonalDataRepository
+from paypal.domain.core.exceptions import UniqueValueTakenError
+
+
+class UpsertUniqueValueTest(TestCase):
+    """
+    AbstractRepository.upsert with rows whose unique email is taken by another primary key.
+    """
+
+    def setUp(self) -> None:
+        self.accounts = [
+            PayPalAccount.objects.create(
+                account_type=AccountConstants.AccountTypes.PERSONAL, balance=decimal.Decimal(1)
+            )
+            for _ in range(3)
+        ]
+        self.repo = AccountPersonalDataRepository()
+        self.repo.upsert([self._get_row(0, 'first@example.com')], batch_size=10)
+
+    def _get_row(self, account: int, email: str) -> dict:
+        return {
+            "account": self.accounts[account].id,
+            "full_name": "Full Name",
+            "date_of_birth": datetime.date(1990, 1, 1),
+            "country": "Country",
+            "phone_number": "+100000000",
+            "avatar": "",
+            "password": "password",
+            "email": email,
+        }
+
+    def test_taken_email_raises(self) -> None:
+        with self.assertRaises(UniqueValueTakenError):
+            self.repo.upsert([self._get_row(1, 'first@example.com')], batch_size=10)
+        self.assertFalse(AccountPersonalData.objects.filter(pk=self.accounts[1].id).exists())
+
+    def test_taken_email_is_rejected(self) -> None:
+        rejected = []
+        summary = self.repo.upsert(
+            [
+                self._get_row(0, 'first@example.com'),
+                self._get_row(1, 'first@example.com'),
+                self._get_row(2, 'third@example.com'),
+            ],
+            batch_size=10,
+            on_reject=lambda row, reason: rejected.append((row["account"], reason)),
+        )
+        self.assertEqual(summary, {"inserted": 1, "updated": 0, "skipped": 1})
+        self.assertEqual([account for account, _ in rejected], [self.accounts[1].id])
+        self.assertIn('email=first@example.com', rejected[0][1])
+        self.assertEqual(
+            AccountPersonalData.objects.get(pk=self.accounts[0].id).email, 'first@example.com'
+        )
+
+    def test_email_taken_within_batch_is_rejected(self) -> None:
+        rejected = []
+        self.repo.upsert(
+            [self._get_row(1, 'second@example.com'), self._get_row(2, 'second@example.com')],
+            batch_size=10,
+            on_reject=lambda row, reason: rejected.append(row["account"]),
+        )
+        self.assertEqual(rejected, [self.accounts[2].id])
+        self.assertTrue(AccountPersonalData.objects.filter(pk=self.accounts[1].id).exists())